@@ -2,22 +2,116 @@ import requests
 import json
 import os
 import threading
+import queue
+import random
+import time
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 
+# 요청 타임아웃 (초)
+REQUEST_TIMEOUT = 10
+# 실패 시 최대 재시도 횟수와 지수 백오프 설정 (초)
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30
+# 연속 실패 몇 번이면 차단할지, 차단 후 몇 초 뒤에 다시 시도할지
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30
+
+
+class CircuitBreaker:
+    """
+    엔드포인트별 서킷 브레이커
+    
+    연속 실패가 BREAKER_THRESHOLD번 쌓이면 열림(open) 상태가 되어 요청을 막고,
+    BREAKER_COOLDOWN초가 지나면 반열림(half_open) 상태에서 요청 하나만 통과시켜
+    성공하면 닫힘(closed), 실패하면 다시 열림 상태로 돌아간다.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow_request(self):
+        """요청을 보내도 되는지 확인"""
+        with self.lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self.state = self.HALF_OPEN
+                self.trial_running = False
+            if self.state == self.HALF_OPEN:
+                # 반열림 상태에서는 시험 요청 하나만 허용
+                if self.trial_running:
+                    return False
+                self.trial_running = True
+            return True
+
+    def record_success(self):
+        """요청 성공 기록"""
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_running = False
+
+    def record_failure(self):
+        """요청 실패 기록"""
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
 
 class LogApiSender:
-    def __init__(self, api_url=None, api_key=None):
+    def __init__(self, api_url=None, api_key=None, metrics=None):
         """
         API 전송 클래스 초기화
         
         Args:
             api_url (str): API 엔드포인트 URL
             api_key (str): API 인증 키
+            metrics (LatencyMetrics): 스냅샷 단계별 지연 시간을 기록할 객체
         """
         self.api_url = os.getenv("API_URL")
         self.api_key = None
         self.headers = None
+        # 연결을 재사용하는 세션 (매 전송마다 TCP/TLS 핸드셰이크 방지)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # 전송 대기 큐 (최신 스냅샷 하나만 보관)와 전송 워커
+        self.send_queue = queue.Queue(maxsize=1)
+        self.new_data = threading.Event()
+        self.worker = None
+        # 엔드포인트별 서킷 브레이커와 전송 통계 (GUI 표시용)
+        self.breakers = {}
+        self.stats = {
+            "sent": 0,
+            "failed": 0,
+            "retried": 0,
+            "rejected": 0,
+            "skipped": 0,
+            "dropped": 0,
+        }
+        self.stats_lock = threading.Lock()
+        # 델타 전송 상태 (서버가 마지막으로 확인한 스냅샷과 시퀀스 번호)
+        self.seq = 0
+        self.acked_seq = 0
+        self.acked_state = None
+        self.state_lock = threading.Lock()
+        self.metrics = metrics
         print(self.api_url)
     
     def set_api_key(self, api_key):
@@ -28,48 +122,306 @@ class LogApiSender:
             "Authorization": f"Bearer {self.api_key}"
         }
 
-    def _send_log_data_thread(self, log_data):
+    def _count(self, name):
+        """전송 통계 증가"""
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def get_stats(self):
+        """
+        전송 통계 조회
+        
+        Returns:
+            dict: 성공/실패/재시도/차단/생략/폐기 횟수와 엔드포인트별 브레이커 상태
+        """
+        with self.stats_lock:
+            stats = dict(self.stats)
+        stats["breakers"] = {name: breaker.state for name, breaker in self.breakers.items()}
+        return stats
+
+    def _get_breaker(self, name):
+        """엔드포인트 이름에 해당하는 서킷 브레이커 반환"""
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            breaker = self.breakers.setdefault(name, CircuitBreaker())
+        return breaker
+
+    def _backoff_delay(self, attempt):
+        """지터가 포함된 지수 백오프 대기 시간 계산 (full jitter)"""
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+    def _request(self, method, name, url, payload, wait=None):
+        """
+        모든 엔드포인트가 공유하는 전송 함수
+        
+        네트워크 오류, 429, 5xx 응답은 지수 백오프로 재시도하고 서킷 브레이커에 실패로
+        기록한다. 그 외 4xx 응답은 재시도하지 않는다. 브레이커가 열려 있으면 요청을
+        보내지 않고 바로 실패를 반환한다.
+        
+        Args:
+            method (str): HTTP 메서드
+            name (str): 서킷 브레이커를 구분할 엔드포인트 이름
+            url (str): 요청 URL
+            payload (dict): 전송할 데이터
+            wait (callable): 재시도 전 대기 함수. 대기 중 더 이상 재시도할 필요가
+                없어지면 True를 반환 (기본값은 time.sleep)
+            
+        Returns:
+            dict: API 응답 데이터
+        """
+        breaker = self._get_breaker(name)
+        data = json.dumps(payload)
+
+        for attempt in range(MAX_RETRIES + 1):
+            if not breaker.allow_request():
+                self._count("rejected")
+                return {
+                    "success": False,
+                    "error": f"{name} 엔드포인트가 일시적으로 차단되었습니다.",
+                    "status_code": None
+                }
+
+            try:
+                response = self.session.request(
+                    method,
+                    url,
+                    headers=self.headers,
+                    data=data,
+                    timeout=REQUEST_TIMEOUT
+                )
+                response.raise_for_status()
+                breaker.record_success()
+                self._count("sent")
+                try:
+                    body = response.json() if response.text else None
+                except ValueError:
+                    body = None
+                return {
+                    "success": True,
+                    "status_code": response.status_code,
+                    "response": body
+                }
+            except requests.exceptions.RequestException as e:
+                status_code = getattr(e.response, "status_code", None) if hasattr(e, "response") else None
+                error = {
+                    "success": False,
+                    "error": str(e),
+                    "status_code": status_code
+                }
+
+            if status_code is not None and status_code < 500 and status_code != 429:
+                # 요청 자체의 문제이므로 재시도하지 않음 (엔드포인트는 정상)
+                breaker.record_success()
+                self._count("failed")
+                return error
+
+            breaker.record_failure()
+            if attempt == MAX_RETRIES:
+                break
+
+            self._count("retried")
+            delay = self._backoff_delay(attempt)
+            if wait is None:
+                time.sleep(delay)
+            elif wait(delay):
+                error["superseded"] = True
+                return error
+
+        self._count("failed")
+        return error
+
+    def _wait_for_newer_snapshot(self, delay):
+        """
+        재시도 대기 중 새 스냅샷이 들어오면 대기를 중단
+        
+        Returns:
+            bool: 새 스냅샷이 대기 중이면 True
+        """
+        deadline = time.monotonic() + delay
+        while True:
+            if not self.send_queue.empty():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self.new_data.wait(remaining)
+            self.new_data.clear()
+
+    def request_resync(self):
+        """다음 전송을 전체 스냅샷으로 보내도록 델타 기준 상태 초기화"""
+        with self.state_lock:
+            self.acked_state = None
+
+    def _make_snapshot(self, log_data):
+        """
+        카드 목록을 엔티티 id 기준 딕셔너리로 변환
+        
+        Args:
+            log_data (dict): {"my_cards": [...], "enemy_cards": [...]} 형태의 데이터
+            
+        Returns:
+            dict: {"my_cards": {id: card}, ...}
+        """
+        return {
+            key: {card["id"]: card for card in cards}
+            for key, cards in log_data.items()
+        }
+
+    def _diff_cards(self, old_cards, new_cards):
+        """
+        두 카드 딕셔너리를 비교해 추가/삭제/변경된 카드 계산
+        
+        Returns:
+            dict: 변경이 있으면 {"added": [...], "removed": [id...], "changed": [...]}, 없으면 None
+        """
+        added = []
+        changed = []
+        for card_id, card in new_cards.items():
+            old_card = old_cards.get(card_id)
+            if old_card is None:
+                added.append(card)
+            elif old_card != card:
+                changed.append(card)
+        removed = [card_id for card_id in old_cards if card_id not in new_cards]
+
+        if not (added or removed or changed):
+            return None
+        return {"added": added, "removed": removed, "changed": changed}
+
+    def build_payload(self, snapshot):
+        """
+        마지막으로 확인된 상태와 비교해 전송할 페이로드 생성
+        
+        기준 상태가 없으면 전체 스냅샷(type=full)을, 있으면 변경분(type=delta)만 보낸다.
+        델타는 항상 서버가 확인한 마지막 상태(base_seq) 기준이므로 중간 전송이 실패해도
+        다음 전송에 누적 변경분이 그대로 포함된다.
+        
+        Args:
+            snapshot (dict): _make_snapshot으로 만든 현재 상태
+            
+        Returns:
+            dict: 전송할 페이로드, 변경이 없으면 None
+        """
+        with self.state_lock:
+            acked_state = self.acked_state
+            base_seq = self.acked_seq
+
+        if acked_state is None:
+            payload = {"type": "full"}
+            for key, cards in snapshot.items():
+                payload[key] = list(cards.values())
+        else:
+            payload = {"type": "delta"}
+            for key, cards in snapshot.items():
+                diff = self._diff_cards(acked_state.get(key, {}), cards)
+                if diff is not None:
+                    payload[key] = diff
+            if len(payload) == 1:
+                return None
+
+        self.seq += 1
+        payload["seq"] = self.seq
+        payload["base_seq"] = base_seq
+        return payload
+
+    def _send_worker(self):
+        """큐에 들어온 최신 스냅샷을 하나씩 전송하는 워커 루프"""
+        while True:
+            log_data, stamps = self.send_queue.get()
+            try:
+                self._send_log_data_thread(log_data, stamps)
+            except Exception as e:
+                print(f"로그 데이터 전송 오류: {str(e)}")
+
+    def _start_worker(self):
+        """전송 워커가 없으면 시작"""
+        if self.worker is None or not self.worker.is_alive():
+            self.worker = threading.Thread(target=self._send_worker, daemon=True)
+            self.worker.start()
+
+    def _send_log_data_thread(self, log_data, stamps=None):
         """
-        별도 스레드에서 로그 데이터를 API로 전송하는 함수
+        전송 워커 스레드에서 로그 데이터를 API로 전송하는 함수
+        
+        전송에 성공하면 보낸 상태를 확인된 상태로 기록하고, 서버가 409 응답이나
+        {"resync": true}로 재동기화를 요청하면 다음 전송을 전체 스냅샷으로 보낸다.
         
         Args:
             log_data (dict): 전송할 로그 데이터
+            stamps (dict): 스냅샷의 단계별 시각 (log, read, parsed, exported)
         """
+        stamps = dict(stamps or {})
         try:
-            response = requests.post(
-                self.api_url,
-                headers=self.headers,
-                data=json.dumps(log_data)
-            )
-            response.raise_for_status()
-            return {
-                "success": True,
-                "status_code": response.status_code,
-                "response": response.json() if response.text else None
-            }
-        except requests.exceptions.RequestException as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "status_code": getattr(e.response, "status_code", None) if hasattr(e, "response") else None
-            }
+            snapshot = self._make_snapshot(log_data)
+            payload = self.build_payload(snapshot)
         except Exception as e:
             return {
                 "success": False,
                 "error": str(e)
             }
 
-    def send_log_data(self, log_data):
+        if payload is None:
+            # 변경된 카드가 없으면 전송 생략
+            self._count("skipped")
+            self._record_latency(stamps)
+            return {
+                "success": True,
+                "skipped": True
+            }
+
+        # 오버레이에서 데이터가 얼마나 오래되었는지 알 수 있도록 단계별 시각 포함
+        stamps["sent"] = time.time()
+        payload["stamps"] = dict(stamps)
+
+        # 재시도 대기 중 새 스냅샷이 들어오면 그 스냅샷으로 넘어감
+        # (델타는 항상 확인된 상태 기준이라 누락되는 변경분이 없음)
+        result = self._request(
+            "POST", "log", self.api_url, payload, wait=self._wait_for_newer_snapshot
+        )
+        if result["success"]:
+            stamps["acked"] = time.time()
+        self._record_latency(stamps)
+
+        if result.get("status_code") == 409:
+            # 서버에서 시퀀스 누락 감지
+            self.request_resync()
+        elif result["success"]:
+            response = result["response"]
+            with self.state_lock:
+                if isinstance(response, dict) and response.get("resync"):
+                    self.acked_state = None
+                else:
+                    self.acked_state = snapshot
+                    self.acked_seq = payload["seq"]
+        return result
+
+    def _record_latency(self, stamps):
+        """스냅샷의 단계별 지연 시간 기록 (metrics가 설정된 경우)"""
+        if self.metrics is not None and stamps:
+            self.metrics.record(stamps)
+
+    def send_log_data(self, log_data, stamps=None):
         """
         로그 데이터를 API로 전송 (비동기 처리)
         
         Args:
             log_data (dict): 전송할 로그 데이터
+            stamps (dict): 스냅샷의 단계별 시각 (log, read, parsed, exported, epoch 초)
         """
-        # 별도 스레드에서 API 요청 실행
-        thread = threading.Thread(target=self._send_log_data_thread, args=(log_data,))
-        thread.daemon = True  # 메인 스레드 종료 시 함께 종료
-        thread.start()
+        self._start_worker()
+
+        # 아직 전송되지 않은 이전 스냅샷은 버리고 최신 상태만 대기시킴
+        # (델타는 워커가 전송 직전에 계산하므로 버려진 스냅샷의 변경분도 포함됨)
+        try:
+            self.send_queue.get_nowait()
+            self._count("dropped")
+        except queue.Empty:
+            pass
+        try:
+            self.send_queue.put_nowait((log_data, stamps))
+        except queue.Full:
+            self._count("dropped")
+        self.new_data.set()
     
             
     def send_game_event(self, game_id, event_type, event_data):
@@ -86,27 +438,10 @@ class LogApiSender:
         """
         endpoint = f"{self.api_url}/games/{game_id}/events"
         
-        try:
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                data=json.dumps({
-                    "type": event_type,
-                    "data": event_data
-                })
-            )
-            response.raise_for_status()
-            return {
-                "success": True,
-                "status_code": response.status_code,
-                "response": response.json() if response.text else None
-            }
-        except requests.exceptions.RequestException as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "status_code": getattr(e.response, "status_code", None) if hasattr(e, "response") else None
-            }
+        return self._request("POST", "events", endpoint, {
+            "type": event_type,
+            "data": event_data
+        })
     
     def send_game_state_update(self, game_id, game_state):
         """
@@ -121,24 +456,7 @@ class LogApiSender:
         """
         endpoint = f"{self.api_url}/games/{game_id}/state"
         
-        try:
-            response = requests.put(
-                endpoint,
-                headers=self.headers,
-                data=json.dumps(game_state)
-            )
-            response.raise_for_status()
-            return {
-                "success": True,
-                "status_code": response.status_code,
-                "response": response.json() if response.text else None
-            }
-        except requests.exceptions.RequestException as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "status_code": getattr(e.response, "status_code", None) if hasattr(e, "response") else None
-            }
+        return self._request("PUT", "state", endpoint, game_state)
             
     def send_game_end(self, game_id, game_result):
         """
@@ -153,21 +471,4 @@ class LogApiSender:
         """
         endpoint = f"{self.api_url}/games/{game_id}/end"
         
-        try:
-            response = requests.post(
-                endpoint,
-                headers=self.headers,
-                data=json.dumps(game_result)
-            )
-            response.raise_for_status()
-            return {
-                "success": True,
-                "status_code": response.status_code,
-                "response": response.json() if response.text else None
-            }
-        except requests.exceptions.RequestException as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "status_code": getattr(e.response, "status_code", None) if hasattr(e, "response") else None
-            } 
\ No newline at end of file
+        return self._request("POST", "end", endpoint, game_result) 
\ No newline at end of file
@@ -16,7 +16,10 @@ DEFAULT_CONFIG = {
         'LOG_PATH': ''
     },
     'Settings': {
-        'MONITOR_INTERVAL': '5'
+        'MONITOR_INTERVAL': '5',
+        'METRICS_PORT': '8787',
+        'PROFILE': 'off',
+        'PROFILE_EVERY': '60'
     }
 }
 
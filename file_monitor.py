@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+
+# watchdog이 설치되어 있으면 OS 파일 변경 알림 사용, 없으면 stat 폴링으로 대체
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class PollingChangeSource:
+    """
+    파일 크기/수정 시간/inode를 비교해 변경을 감지하는 변경 감지기
+
+    poll()을 호출할 때마다 os.stat 한 번으로 마지막 확인 이후 변경 여부를 판단한다.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.last_stat = None
+
+    def _stat(self):
+        """감시 중인 파일의 (inode, 크기, 수정 시간), 파일이 없으면 None"""
+        try:
+            stat = os.stat(self.path)
+        except (OSError, TypeError):
+            return None
+        return (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def watch(self, path):
+        """
+        감시할 파일 설정
+
+        Args:
+            path (str): 감시할 파일 경로 (None이면 감시 중지)
+        """
+        self.path = path
+        self.last_stat = self._stat()
+
+    def poll(self):
+        """
+        마지막 확인 이후 파일이 변경되었는지 확인
+
+        Returns:
+            bool: 변경되었으면 True
+        """
+        if self.path is None:
+            return False
+        current = self._stat()
+        if current == self.last_stat:
+            return False
+        self.last_stat = current
+        return True
+
+    def wait(self, timeout):
+        """
+        다음 확인 시점까지 대기
+
+        Args:
+            timeout (float): 최대 대기 시간 (초)
+        """
+        time.sleep(timeout)
+
+    def stop(self):
+        """감시 중지"""
+        self.watch(None)
+
+
+class _PathEventHandler(FileSystemEventHandler):
+    """감시 중인 파일에 대한 이벤트가 오면 플래그 설정"""
+
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+
+    def on_any_event(self, event):
+        path = self.source.path
+        if path is None:
+            return
+        paths = (event.src_path, getattr(event, "dest_path", None))
+        if any(p and os.path.normcase(os.path.abspath(p)) == path for p in paths):
+            self.source.changed.set()
+
+
+class WatchdogChangeSource(PollingChangeSource):
+    """
+    OS 파일 변경 알림(watchdog)으로 변경을 감지하는 변경 감지기
+
+    알림은 감시 스레드에서 플래그만 설정하고, poll()은 플래그가 없으면 stat으로도 확인한다.
+    Windows에서는 다른 프로세스가 열어 둔 파일(Power.log)의 크기/수정 시간 변경이
+    캐시가 비워지거나 핸들이 닫힐 때까지 알려지지 않을 수 있기 때문이다.
+    감시를 시작하지 못하면 stat 폴링으로만 동작한다.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.changed = threading.Event()
+        self.observer = None
+        self.watched_dir = None
+        self.handler = _PathEventHandler(self)
+
+    def watch(self, path):
+        if path is not None:
+            path = os.path.normcase(os.path.abspath(path))
+        super().watch(path)
+        self.changed.clear()
+
+        directory = os.path.dirname(path) if path else None
+        if directory == self.watched_dir:
+            return
+        self._stop_observer()
+        if directory is None:
+            return
+        try:
+            self.observer = Observer()
+            self.observer.daemon = True
+            self.observer.schedule(self.handler, directory, recursive=False)
+            self.observer.start()
+            self.watched_dir = directory
+        except Exception as e:
+            print(f"파일 변경 알림을 시작할 수 없어 폴링으로 대체합니다: {str(e)}")
+            self.observer = None
+
+    def poll(self):
+        if self.observer is not None and self.changed.is_set():
+            self.changed.clear()
+            # 같은 변경을 stat으로 한 번 더 감지하지 않도록 기준 갱신
+            super().poll()
+            return True
+        # 알림이 늦거나 오지 않아도 stat 한 번으로 변경 확인
+        return super().poll()
+
+    def wait(self, timeout):
+        if self.observer is None:
+            return super().wait(timeout)
+        # 변경 알림이 오면 바로 깨어남
+        self.changed.wait(timeout)
+
+    def _stop_observer(self):
+        if self.observer is not None:
+            try:
+                self.observer.stop()
+            except Exception as e:
+                print(f"파일 변경 알림 중지 오류: {str(e)}")
+            self.observer = None
+        self.watched_dir = None
+
+    def stop(self):
+        self.watch(None)
+
+
+def create_change_source(use_notifications=True):
+    """
+    사용할 수 있는 변경 감지기 생성
+
+    Args:
+        use_notifications (bool): OS 파일 변경 알림 사용 여부
+
+    Returns:
+        PollingChangeSource: watchdog이 있으면 WatchdogChangeSource
+    """
+    if use_notifications and Observer is not None:
+        return WatchdogChangeSource()
+    return PollingChangeSource()
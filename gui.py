@@ -1,15 +1,23 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 import configparser
+import gc
 import os
 import re
+import queue
+import threading
 from datetime import datetime
 
 # 로그 파서 모듈 임포트
 from log_parser import HSLogWatcher
+from metrics import DEFAULT_METRICS_PORT
+from profiler import DEFAULT_PROFILE_EVERY, PROFILE_FILE
 from dotenv import load_dotenv
 load_dotenv()
 
+# 다른 스레드에서 보낸 로그 메시지를 처리하는 주기 (ms)
+UI_QUEUE_INTERVAL_MS = 100
+
 class SettingsGUI:
     def __init__(self, root):
         self.root = root
@@ -29,9 +37,14 @@ class SettingsGUI:
         self.status_var = tk.StringVar(value="준비")
         self.is_running = tk.BooleanVar(value=False)
         self.api_key_var = tk.StringVar()  # API 키 변수 추가
+        self.sender_stats_var = tk.StringVar()  # API 전송 통계
+        self.latency_var = tk.StringVar()  # 단계별 지연 시간
+        self.latency_text = None  # 지연 분포 창의 텍스트 위젯
         
         # 메시지 큐 (log_text가 초기화되기 전 메시지 저장용)
         self.message_queue = []
+        # 감시 스레드에서 보낸 메시지 큐 (메인 스레드에서 꺼내 표시)
+        self.ui_queue = queue.Queue()
         
         # 로그 텍스트 위젯 (반드시 여기서 초기화)
         self.log_text = None
@@ -50,6 +63,28 @@ class SettingsGUI:
         # 설정 로드 (위젯 생성 후에 로드하여 로그 출력 가능)
         self.load_config()
 
+        # 로컬 메트릭 엔드포인트 시작 ([Settings] metrics_port, 0이면 사용 안 함)
+        try:
+            metrics_port = self.config.getint('Settings', 'metrics_port', fallback=DEFAULT_METRICS_PORT)
+        except ValueError:
+            self.add_log("metrics_port 설정이 올바르지 않아 기본 포트를 사용합니다.")
+            metrics_port = DEFAULT_METRICS_PORT
+        self.log_watcher.start_metrics_server(metrics_port)
+
+        # 틱 프로파일링 ([Settings] profile = off/timers/cprofile/tracemalloc, profile_every = N틱)
+        profile_mode = self.log_watcher.profiler.configure(
+            self.config.get('Settings', 'profile', fallback='off'),
+            self.config.get('Settings', 'profile_every', fallback=DEFAULT_PROFILE_EVERY),
+        )
+        if profile_mode != "off":
+            self.add_log(f"프로파일링 사용 중 ({profile_mode}): {os.path.abspath(PROFILE_FILE)}")
+
+        # API 전송 통계 주기적으로 갱신
+        self.update_sender_stats()
+
+        # 감시 스레드 메시지 처리 시작
+        self.process_ui_queue()
+
 
     
     def process_message_queue(self):
@@ -112,8 +147,20 @@ class SettingsGUI:
             self.add_log("하스스톤 로그 감시를 시작합니다.")
             
     
+    def process_ui_queue(self):
+        """감시 스레드에서 보낸 메시지를 메인 스레드에서 로그창에 표시"""
+        try:
+            while True:
+                self.add_log(self.ui_queue.get_nowait())
+        except queue.Empty:
+            pass
+        self.root.after(UI_QUEUE_INTERVAL_MS, self.process_ui_queue)
+
     def add_log(self, message: str):
-        """로그창에 메시지 추가"""
+        """로그창에 메시지 추가 (다른 스레드에서 호출되면 큐를 거쳐 메인 스레드에서 표시)"""
+        if threading.current_thread() is not threading.main_thread():
+            self.ui_queue.put(message)
+            return
         try:
             if self.log_text:
                 # 필드 로그인 경우
@@ -133,6 +180,55 @@ class SettingsGUI:
         except Exception as e:
             print(f"로그 추가 오류: {str(e)}")
     
+    def update_sender_stats(self):
+        """API 전송 통계 레이블 갱신 (1초마다)"""
+        try:
+            if self.log_watcher and self.log_watcher.api_sender:
+                stats = self.log_watcher.api_sender.get_stats()
+                breaker_state = stats["breakers"].get("log", "closed")
+                state_text = {
+                    "closed": "정상",
+                    "open": "차단됨",
+                    "half_open": "재시도 대기",
+                }.get(breaker_state, breaker_state)
+                self.sender_stats_var.set(
+                    f"전송 {stats['sent']} / 실패 {stats['failed']} / 재시도 {stats['retried']} / "
+                    f"차단 {stats['rejected']} / 생략 {stats['skipped']} (API: {state_text})"
+                )
+            if self.log_watcher:
+                self.update_latency(self.log_watcher.metrics)
+        except Exception as e:
+            print(f"전송 통계 갱신 오류: {str(e)}")
+        self.root.after(1000, self.update_sender_stats)
+
+    def update_latency(self, metrics):
+        """단계별 지연 시간 레이블과 지연 분포 창 갱신 (p50/p95, ms)"""
+        parts = []
+        for label, p50, p95, _ in metrics.summary():
+            if p50 is not None:
+                parts.append(f"{label} {p50 * 1000:.0f}/{p95 * 1000:.0f}")
+        if parts:
+            self.latency_var.set("지연 p50/p95(ms): " + " · ".join(parts))
+
+        if self.latency_text and self.latency_text.winfo_exists():
+            self.latency_text.configure(state="normal")
+            self.latency_text.delete(1.0, tk.END)
+            self.latency_text.insert(tk.END, metrics.format_histograms())
+            self.latency_text.configure(state="disabled")
+
+    def show_latency_window(self):
+        """단계별 지연 시간 히스토그램 창 열기 (열려 있는 동안 1초마다 갱신)"""
+        if self.latency_text and self.latency_text.winfo_exists():
+            self.latency_text.winfo_toplevel().lift()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("지연 분포")
+        window.geometry("460x600")
+        self.latency_text = scrolledtext.ScrolledText(window, font=("Courier", 9), state="disabled")
+        self.latency_text.pack(fill="both", expand=True)
+        if self.log_watcher:
+            self.update_latency(self.log_watcher.metrics)
+
     def update_field_log(self, message: str):
         """필드 로그창 업데이트 (항상 최신 정보만 표시)"""
         try:
@@ -190,9 +286,20 @@ class SettingsGUI:
         status_label = tk.Label(self.root, textvariable=self.status_var)
         status_label.pack(pady=5)
         
+        # API 전송 통계 레이블
+        sender_stats_label = tk.Label(self.root, textvariable=self.sender_stats_var, fg="gray")
+        sender_stats_label.pack(pady=(0, 5))
+
+        # 단계별 지연 시간 레이블
+        latency_label = tk.Label(self.root, textvariable=self.latency_var, fg="gray", wraplength=460)
+        latency_label.pack(pady=(0, 5))
+        
         # 시작/중지 버튼
         self.start_btn = tk.Button(self.root, text="시작", width=10, command=self.toggle_monitoring)
         self.start_btn.pack(pady=5)
+
+        # 지연 분포 창 열기 버튼
+        tk.Button(self.root, text="지연 분포", command=self.show_latency_window).pack()
         
         # # 필드 로그창 제목
         # tk.Label(self.root, text="현재 필드 상태", anchor="w").pack(pady=(10,0), padx=20, anchor="w")
@@ -243,6 +350,8 @@ class SettingsGUI:
 def main():
     root = tk.Tk()
     app = SettingsGUI(root)
+    # 시작할 때 만들어진 객체(모듈, 위젯 등)는 GC 대상에서 제외해 이후 수집 시간을 줄임
+    gc.freeze()
     root.mainloop()
 
 if __name__ == "__main__":
@@ -1,33 +1,133 @@
 import sys
 import os
+import io
 import re
 from datetime import datetime
 import traceback
 import gc
+import pickle
+import threading
+import time
+from contextlib import contextmanager
 
 # python-hslog 경로 추가
 sys.path.append(os.path.join(os.path.dirname(__file__), 'python-hslog'))
-from hslog.parser import LogParser
-from hslog.export import EntityTreeExporter, FriendlyPlayerExporter 
+from hslog.parser import LogParser, ParserCheckpoint, ParserObserver
+from hslog.export import IncrementalEntityTreeExporter, FriendlyPlayerExporter
 from hearthstone.enums import GameTag, Zone
 from hearthstone.entities import Card, Game, Player
-from typing import assert_type
 from api_sender import LogApiSender
+from file_monitor import create_change_source
+from metrics import LatencyMetrics, MetricsServer, parse_log_time
+from profiler import TickProfiler
+
+# 파서 체크포인트 저장 파일 (settings.ini와 같은 위치)
+CHECKPOINT_FILE = "parser_checkpoint.dat"
+# 몇 번의 주기마다 체크포인트를 저장할지
+CHECKPOINT_INTERVAL = 12
+# 전체 감시 주기 (초, 새 로그 폴더 확인, 체크포인트 저장)
+FULL_TICK_INTERVAL = 5
+# Power.log 변경 확인 주기 (초, 변경이 있을 때만 파싱)
+CHANGE_POLL_INTERVAL = 0.1
+# 감시 스레드 종료 대기 시간 (초)
+STOP_TIMEOUT = 2
+# 한 번에 이만큼 이상 읽을 때(시작 시 밀린 로그 등)는 파싱 중 GC 주기를 늘림
+BULK_PARSE_BYTES = 1 << 20
+# 대량 파싱 중 세대 0 GC 임계값 (기본값 700)
+BULK_PARSE_GC_THRESHOLD = 100000
+
+
+@contextmanager
+def bulk_parse_gc(size):
+    """
+    대량 파싱 중 세대 0 GC 임계값을 높여 수집 횟수를 줄임
+
+    패킷 트리에는 순환 참조가 없어 참조 카운트만으로 해제되므로,
+    파싱 중 만들어지는 객체를 GC가 반복해서 훑을 필요가 없다.
+
+    Args:
+        size (int): 이번에 읽을 바이트 수 (BULK_PARSE_BYTES 미만이면 그대로 둠)
+    """
+    if size < BULK_PARSE_BYTES:
+        yield
+        return
+    thresholds = gc.get_threshold()
+    gc.set_threshold(max(thresholds[0], BULK_PARSE_GC_THRESHOLD), *thresholds[1:])
+    try:
+        yield
+    finally:
+        gc.set_threshold(*thresholds)
+
+
+class GameChangeObserver(ParserObserver):
+    """
+    파싱 중 게임 상태가 바뀌었는지 기록하는 옵저버
+
+    줄이 파싱되는 즉시 호출되므로, 변경 알림으로 호출된 주기에서
+    게임 상태 변화가 없으면 익스포트와 전송을 생략할 수 있다.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        # 처음에는 전체 상태를 한 번 보내야 하므로 변경된 것으로 시작
+        self.changed = True
+        # 로그 끝까지 따라잡은 뒤에만 True (다시 파싱하는 지난 게임은 알리지 않음)
+        self.live = False
+
+    def on_game_created(self, packet_tree):
+        self.changed = True
+
+    def on_block_end(self, block):
+        self.changed = True
+
+    def on_tag_change(self, packet_tree, entity_id, tag, value):
+        self.changed = True
+
+    def on_entity(self, packet_tree, packet):
+        # 블록 밖에서 카드가 생성/공개/변경되는 경우
+        self.changed = True
+
+    def on_game_ended(self, packet_tree):
+        self.changed = True
+        if self.live and self.callback:
+            self.callback("게임이 종료되었습니다.")
 
 
 class HSLogWatcher:
     def __init__(self, callback_func=None, is_running=None):
         self.log_path = None
-        self.parser = LogParser()  # 다시 초기화
+        self.game_observer = GameChangeObserver(callback_func)
+        self.parser = self.create_parser()
         self.callback = callback_func
         self.is_mounted = False
         self.last_log_path = None
         self.install_path = None
         self.is_running = is_running
         self.root = None
-        self.after_id = None
+        # 백그라운드 감시 스레드
+        self.worker = None
+        self.stop_event = threading.Event()
         self.exporter =None
-        self.api_sender = LogApiSender()
+        # 파서를 초기화한 뒤 로그 끝까지 한 번 읽었는지 여부
+        self.caught_up = False
+        # Power.log 변경 감지기 (OS 알림, 없으면 stat 폴링)
+        self.change_source = create_change_source()
+        # 스냅샷 단계별 지연 시간 (GUI와 로컬 메트릭 엔드포인트에 표시)
+        self.metrics = LatencyMetrics()
+        self.metrics_server = None
+        self.api_sender = LogApiSender(metrics=self.metrics)
+        # 마지막으로 읽은 줄의 로그 시각과 읽기/파싱 완료 시각
+        self.read_stamps = {}
+        # 틱 단계별 시간 측정 (settings.ini [Settings] profile 또는 HS_TRACKER_PROFILE)
+        self.profiler = TickProfiler()
+        self.profiler.configure()
+        # 증분 파싱 상태 (이미 읽은 바이트 위치와 파일 식별자)
+        self.log_offset = 0
+        self.log_file_id = None
+        # 재시작 시 이어서 파싱하기 위한 체크포인트
+        self.checkpoint_path = CHECKPOINT_FILE
+        self.checkpoint_offset = 0
+        self.ticks_since_checkpoint = 0
         
 
     def set_install_path(self, path):
@@ -37,10 +137,34 @@ class HSLogWatcher:
         if path != self.log_path:
             self.log_path = path
             self.last_log_path = path
+            self.change_source.watch(path)
             if self.callback:
                 self.callback(f"로그 파일 설정: {path}")
             # 새 로그 경로로 변경되면 파서 재설정
-            self.parser = LogParser()
+            self.reset_parser()
+
+    def create_parser(self):
+        """게임 변경 옵저버가 연결된 파서 생성"""
+        # 타임스탬프는 읽을 때만 파싱하고, 마지막 게임만 메모리에 유지
+        # 카드 정보에 필요 없는 선택지/연출 관련 줄은 파싱하지 않음
+        parser = LogParser(
+            lazy_timestamps=True,
+            columnar_tag_changes=True,
+            max_games=1,
+            profile="entities",
+        )
+        parser.add_observer(self.game_observer)
+        self.game_observer.changed = True
+        return parser
+
+    def reset_parser(self):
+        """파서와 증분 읽기 위치 초기화 (처음부터 다시 파싱)"""
+        self.parser = self.create_parser()
+        self.exporter = None
+        self.log_offset = 0
+        self.log_file_id = None
+        self.checkpoint_offset = 0
+        self.caught_up = False
     
     def mount_log_file(self):
         """로그 파일 마운트"""
@@ -68,23 +192,156 @@ class HSLogWatcher:
 
     def parse_log_file(self):
         try:
-            # 가비지 컬렉션 명시적 호출
-            gc.collect()
-            self.parser = LogParser()  # LogParser 내부 로직으로 인해 매번 새로 생성
-            # 로그 파일 열기 시도 (읽기 권한 확인)
-            with open(self.log_path, 'r', encoding='utf-8') as f:
-                self.parser.read(f)
-                self.is_mounted = True
-                # print(f"게임 로그 파싱 완료: {len(self.parser.games)} 게임(들)")
-                return True
+            stat = os.stat(self.log_path)
+        except (OSError, TypeError) as e:
+            # 로그 폴더가 잠시 없거나 아직 로그 경로가 정해지지 않음
+            return self.unmount_log_file(e)
+        try:
+            file_id = (stat.st_dev, stat.st_ino)
+
+            # 파일이 교체(로테이션)되었거나 잘린 경우에만 처음부터 다시 파싱
+            if self.parser is None or file_id != self.log_file_id or stat.st_size < self.log_offset:
+                if file_id == self.log_file_id:
+                    # 같은 파일이 잘렸으면 이전 체크포인트는 더 이상 유효하지 않음
+                    self.discard_checkpoint()
+                self.reset_parser()
+                self.log_file_id = file_id
+                # 같은 파일에 대한 체크포인트가 있으면 그 위치부터 이어서 파싱
+                self.load_checkpoint(stat.st_size)
+
+            # 마지막으로 읽은 위치 이후에 추가된 줄만 파서에 전달
+            if stat.st_size > self.log_offset:
+                size = stat.st_size - self.log_offset
+                # 처음부터 다시 읽는 지난 게임의 종료는 알리지 않음
+                self.game_observer.live = self.caught_up
+                # 밀린 로그를 따라잡는 읽기는 몇 시간 전 줄일 수 있어 지연 시간 측정에서 제외
+                stamp = self.caught_up and size < BULK_PARSE_BYTES
+                with bulk_parse_gc(size):
+                    self.read_new_lines(stamp=stamp)
+            if not self.stop_event.is_set():
+                self.caught_up = True
+
+            self.is_mounted = True
+            return True
+        except OSError as e:
+            # 파일을 잠시 읽을 수 없음 (Windows 공유 위반 등)
+            return self.unmount_log_file(e)
         except Exception as e:
-            print(e)
-            self.is_mounted = False
+            # 파서에서 오류가 나면 파싱 상태가 깨졌을 수 있으므로 체크포인트도 버림
+            self.discard_checkpoint()
+            return self.unmount_log_file(e)
+
+    def unmount_log_file(self, error):
+        """
+        로그 파일 파싱 실패 시 파서를 초기화하고 다음 주기에 다시 시도
+        
+        체크포인트는 지우지 않으므로 다음 주기에는 체크포인트 위치부터 이어서 파싱한다.
+        
+        Args:
+            error (Exception): 발생한 오류
+        
+        Returns:
+            bool: 항상 False
+        """
+        print(error)
+        self.reset_parser()
+        self.is_mounted = False
+        if self.callback:
+            self.callback(f"게임 시작 대기중...")
+        return False
+
+    def read_new_lines(self, chunk_size=1 << 20, stamp=True):
+        """
+        Power.log에서 log_offset 이후에 추가된 완전한 줄만 읽어 파서에 전달
+        
+        아직 줄바꿈이 기록되지 않은 마지막 줄은 다음 주기에 다시 읽습니다.
+        감시 중지 요청이 오면 읽은 청크까지만 처리하고 멈춥니다.
+
+        Args:
+            chunk_size (int): 한 번에 읽을 바이트 수
+            stamp (bool): 지연 시간 측정용 읽기/파싱 시각을 기록할지 여부
+        """
+        with open(self.log_path, 'rb') as f:
+            f.seek(self.log_offset)
+            pending = b""
+            while not self.stop_event.is_set():
+                chunk = f.read(chunk_size)
+                read_time = time.time()
+                if not chunk:
+                    break
+                data = pending + chunk
+                end = data.rfind(b"\n")
+                if end < 0:
+                    pending = data
+                    continue
+                pending = data[end + 1:]
+                # 텍스트 모드 open()과 동일하게 줄바꿈 처리
+                text = io.StringIO(data[:end + 1].decode('utf-8'), newline=None)
+                for line in text:
+                    self.parser.read_line(line)
+                self.log_offset += end + 1
+                if not stamp:
+                    continue
+                # 지연 시간 측정용으로 가장 최근 줄의 로그 시각 기록
+                newest_line = data[data.rfind(b"\n", 0, end) + 1:end]
+                self.read_stamps = {
+                    "log": parse_log_time(newest_line, read_time),
+                    "read": read_time,
+                    "parsed": time.time(),
+                }
+
+    def save_checkpoint(self):
+        """현재 파서 상태를 체크포인트 파일에 저장 (읽은 위치가 바뀐 경우에만)"""
+        if not self.parser or not self.log_path or not self.log_offset:
+            return False
+        if self.log_offset == self.checkpoint_offset:
+            return True
+        try:
+            checkpoint = self.parser.checkpoint(self.log_offset)
+            tmp_path = self.checkpoint_path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((self.log_path, self.log_file_id), f, protocol=pickle.HIGHEST_PROTOCOL)
+                checkpoint.dump(f)
+            os.replace(tmp_path, self.checkpoint_path)
+            self.checkpoint_offset = self.log_offset
+            return True
+        except Exception as e:
+            print(f"체크포인트 저장 오류: {e}")
+            return False
+
+    def load_checkpoint(self, file_size):
+        """현재 로그 파일에 대한 체크포인트가 있으면 파서 상태 복원"""
+        if not os.path.exists(self.checkpoint_path):
+            return False
+        current_file_id = self.log_file_id
+        try:
+            with open(self.checkpoint_path, 'rb') as f:
+                log_path, file_id = pickle.load(f)
+                if log_path != self.log_path or file_id != self.log_file_id:
+                    return False
+                checkpoint = ParserCheckpoint.load(f)
+            if checkpoint.offset > file_size:
+                return False
+            self.log_offset = self.parser.restore(checkpoint)
+            self.checkpoint_offset = self.log_offset
             if self.callback:
-                self.callback(f"게임 시작 대기중...")
+                self.callback(f"이전 파싱 위치에서 이어서 진행합니다: {self.log_offset} bytes")
+            return True
+        except Exception as e:
+            print(f"체크포인트 로드 오류: {e}")
+            self.reset_parser()
+            self.log_file_id = current_file_id
             return False
 
-    
+    def discard_checkpoint(self):
+        """저장된 체크포인트 삭제"""
+        self.checkpoint_offset = 0
+        try:
+            if os.path.exists(self.checkpoint_path):
+                os.remove(self.checkpoint_path)
+        except OSError as e:
+            print(f"체크포인트 삭제 오류: {e}")
+
     def find_latest_log_file(self, install_path):
         """최신 로그 폴더와 Power.log 파일 찾기"""
         logs_dir = os.path.join(install_path, "Logs")
@@ -126,16 +383,26 @@ class HSLogWatcher:
         power_log_path = os.path.join(latest_folder, "Power.log")
         return power_log_path
     
+    def card_to_dict(self, entity):
+        """전송용 카드 정보"""
+        return {"id": entity.id,
+                "realId": entity.tags.get(GameTag.CREATOR_DBID, 0),
+                "cardId": getattr(entity, 'card_id', None) or None}
+
+    def get_zone_cards(self, player, zone=None):
+        """
+        익스포터의 (컨트롤러, 영역) 인덱스로 플레이어의 카드 조회
+        
+        Args:
+            player (Player): 카드를 조회할 플레이어
+            zone (Zone): 조회할 영역 (None이면 모든 영역)
+        """
+        entities = self.exporter.find_entities_by_zone(player.player_id, zone)
+        return [self.card_to_dict(entity) for entity in entities]
+
     def get_my_hand(self,me,game):
         try:
-            minions = []
-            for entity in game.entities:
-                if assert_type(entity, Card):
-                    if entity.zone == Zone.HAND and entity.tags[GameTag.CONTROLLER] == me.tags[GameTag.CONTROLLER] :
-                        minions.append({"id": entity.id,
-                                        "realId":entity.tags.get(GameTag.CREATOR_DBID,0),
-                                        "cardId": entity.card_id if hasattr(entity, 'card_id') and entity.card_id else None})
-            return minions
+            return self.get_zone_cards(me, Zone.HAND)
         except Exception as e:
             print(e)
             traceback.print_exc()
@@ -145,14 +412,7 @@ class HSLogWatcher:
         
     def get_field(self,player,game):
         try:
-            minions = []
-            for entity in game.entities:
-                if assert_type(entity, Card):
-                    if entity.zone == Zone.PLAY and entity.tags[GameTag.CONTROLLER] == player.tags[GameTag.CONTROLLER]:
-                        minions.append({"id": entity.id,
-                                        "realId":entity.tags.get(GameTag.CREATOR_DBID,0),
-                                        "cardId": entity.card_id if hasattr(entity, 'card_id') and entity.card_id else None})
-            return minions
+            return self.get_zone_cards(player, Zone.PLAY)
         except Exception as e:
             print(e)
             traceback.print_exc()
@@ -162,14 +422,7 @@ class HSLogWatcher:
         
     def get_grave(self,player):
         try:
-            graves = []
-            for entity in player.entities:
-                if assert_type(entity, Card):   
-                    if entity.zone == Zone.GRAVEYARD:
-                        graves.append({"id": entity.id,
-                                        "realId":entity.tags.get(GameTag.CREATOR_DBID,0),
-                                        "cardId": entity.card_id if hasattr(entity, 'card_id') and entity.card_id else None})
-            return graves
+            return self.get_zone_cards(player, Zone.GRAVEYARD)
         except Exception as e:
             print(e)
             traceback.print_exc()
@@ -179,16 +432,7 @@ class HSLogWatcher:
     
     def get_all_player_cards(self,player):
         try:
-            cards = []
-            for entity in player.entities:
-                try:
-                    if assert_type(entity, Card):
-                        cards.append({"id": entity.id,
-                                    "realId":entity.tags.get(GameTag.CREATOR_DBID,0),
-                                    "cardId": entity.card_id if hasattr(entity, 'card_id') and entity.card_id else None})
-                except Exception as e:
-                    print(e)
-            return cards
+            return self.get_zone_cards(player)
         except Exception as e:
             print(e)
             traceback.print_exc()
@@ -202,7 +446,11 @@ class HSLogWatcher:
             games = self.parser.games
             # 게임 정보 가져오기
             last_game = games[-1]
-            self.exporter = EntityTreeExporter(last_game)
+            # 같은 게임이면 이전 익스포터를 재사용해 새로 추가된 패킷만 반영
+            if self.exporter is None or self.exporter.packet_tree is not last_game:
+                self.exporter = IncrementalEntityTreeExporter(last_game)
+                # 새 게임은 전체 스냅샷부터 다시 전송
+                self.api_sender.request_resync()
             exported_game = self.exporter.export().game
             if not exported_game:
                 return None
@@ -237,29 +485,45 @@ class HSLogWatcher:
 
     def get_all_cards(self,game):
         try:
-            cards = []
-            for entity in game.entities:
-                if assert_type(entity, Card):
-                    cards.append({"id": entity.id,
-                                 "realId":entity.tags.get(GameTag.CREATOR_DBID,0),
-                                 "cardId": entity.card_id if hasattr(entity, 'card_id') and entity.card_id else None})
-            return cards
+            return [self.card_to_dict(entity) for entity in self.exporter.find_entities_by_zone()]
         except Exception as e:
             print(e)
             traceback.print_exc()
             return []
     
 
-    def schedular(self):
+    def tick(self, remount=True):
+        """
+        한 번의 감시 작업 (로그 파일 마운트, 새 줄 파싱, API 전송)
+        
+        Args:
+            remount (bool): 최신 로그 폴더를 다시 찾을지 여부 (변경 알림으로 호출될 때는 생략)
+        """
+        # 읽기/파싱 시각은 이번 주기에 읽은 줄에 대해서만 사용
+        # (상태 변화 없이 끝난 이전 주기의 시각이 남으면 추출 단계 지연이 부풀려짐)
+        self.read_stamps = {}
         try: 
-        # 일정 주기마다 가비지 컬렉션 실행
-            gc.collect()
-            
-            self.mount_log_file()
-            self.parse_log_file()  # 다시 LogParser 생성
+            profiler = self.profiler
+            if remount or not self.is_mounted:
+                with profiler.stage("mount_log_file"):
+                    self.mount_log_file()
+            with profiler.stage("parse_log_file"):
+                self.parse_log_file()  # 새로 추가된 줄만 파싱
+
+            # 변경 알림으로 호출되었는데 게임 상태가 바뀌지 않았으면 익스포트/전송 생략
+            # (엔티티의 tag= 줄이 두 번에 나뉘어 읽힌 경우 나머지 태그는 알림이 없으므로
+            #  다음 전체 주기, 최대 FULL_TICK_INTERVAL초 뒤에 반영됨)
+            if not remount and not self.game_observer.changed:
+                return
 
             if self.callback and self.is_mounted:
-                me, enemy, last_game = self.get_last_game_players()
+                with profiler.stage("get_last_game_players"):
+                    players = self.get_last_game_players()
+                if players is None:
+                    # 아직 게임 생성 중이면 다음 변경 때 다시 시도
+                    return
+                self.game_observer.changed = False
+                me, enemy, last_game = players
 
                 # hand_data = self.get_my_hand(me,last_game)
                 # my_field_data = self.get_field(me,last_game)
@@ -267,10 +531,11 @@ class HSLogWatcher:
                 # my_grave_data = self.get_grave(me)
                 # enemy_grave_data = self.get_grave(enemy)
 
-                my_cards = self.get_all_player_cards(me)
-                enemy_cards = self.get_all_player_cards(enemy)
+                with profiler.stage("extract_cards"):
+                    my_cards = self.get_all_player_cards(me)
+                    enemy_cards = self.get_all_player_cards(enemy)
 
-                all_cards = self.get_all_cards(last_game)
+                    all_cards = self.get_all_cards(last_game)
 
                 # 게임 데이터 수집
                 game_data = {
@@ -279,40 +544,124 @@ class HSLogWatcher:
                 }
                 
                 # API로 데이터 전송 (비동기적으로 처리됨)
-                self.api_sender.send_log_data(game_data)
+                # 새로 읽은 줄이 없는 주기적 재전송은 추출 이후 단계만 측정
+                stamps = dict(self.read_stamps, exported=time.time())
+                with profiler.stage("send_log_data"):
+                    self.api_sender.send_log_data(game_data, stamps)
                 
                 # UI에 필드 정보 표시
                 # self.callback(f"내 카드: {len(my_cards)} {my_cards}\n\n적 카드: {len(enemy_cards)} {enemy_cards}\n")
         except Exception as e:
             # print(e)
             # traceback.print_exc()
+            # 다음 주기에 다시 전송하도록 변경 상태 유지
+            self.game_observer.changed = True
             if self.callback:
                 self.callback(f"일시적 오류 발생... 재시도중:")
 
-        self.after_id = self.root.after(5000, self.schedular)
+    def schedular(self):
+        """전체 감시 주기 (변경 알림이 없어도 새 로그 폴더 확인 및 체크포인트 저장)"""
+        # 프로파일링이 켜져 있으면 N틱마다 단계별 시간과 프로파일 결과를 파일에 기록
+        self.profiler.run_tick(self.tick)
 
-            
+        # 일정 주기마다 체크포인트 저장
+        self.ticks_since_checkpoint += 1
+        if self.is_mounted and self.ticks_since_checkpoint >= CHECKPOINT_INTERVAL:
+            self.ticks_since_checkpoint = 0
+            self.save_checkpoint()
 
-    def start_log_watcher(self):
-        self.schedular()
+    def check_changes(self):
+        """Power.log 변경을 확인하고 변경되었으면 바로 파싱"""
+        try:
+            if self.change_source.poll():
+                self.profiler.run_change_tick(self.tick, remount=False)
+        except Exception as e:
+            print(f"로그 변경 확인 오류: {str(e)}")
+
+    def run_worker(self):
+        """
+        백그라운드 감시 스레드 루프
+        
+        파싱, 익스포트, 전송을 모두 이 스레드에서 실행해 Tk 메인 스레드가 멈추지 않도록 한다.
+        메시지는 callback을 통해 전달되며 GUI 쪽에서 큐로 받아 메인 스레드에서 표시한다.
+        """
+        next_full_tick = 0
+        try:
+            while not self.stop_event.is_set():
+                if time.monotonic() >= next_full_tick:
+                    self.schedular()
+                    next_full_tick = time.monotonic() + FULL_TICK_INTERVAL
+                else:
+                    self.check_changes()
+
+                # 변경 알림이 오거나 확인 주기가 지날 때까지 대기
+                remaining = next_full_tick - time.monotonic()
+                self.change_source.wait(max(0, min(CHANGE_POLL_INTERVAL, remaining)))
+        finally:
+            self.shutdown()
 
+    def start_log_watcher(self):
+        """백그라운드 감시 스레드 시작"""
+        if self.worker and self.worker.is_alive():
+            # 이전 스레드가 아직 정리 중이면 끝날 때까지 대기
+            self.worker.join()
+        self.stop_event.clear()
+        self.worker = threading.Thread(target=self.run_worker, daemon=True)
+        self.worker.start()
 
     def stop_log_watcher(self):
+        """감시 스레드 중지 요청 (정리 작업은 스레드가 종료되면서 수행)"""
+        self.stop_event.set()
+        if self.worker:
+            self.worker.join(timeout=STOP_TIMEOUT)
+
+    def shutdown(self):
+        """감시 스레드 종료 시 정리 작업"""
         if self.callback:
             self.callback("로그 감시가 중지되었습니다.")
+        # 다음 실행 때 이어서 파싱할 수 있도록 체크포인트 저장
+        if self.is_mounted:
+            self.save_checkpoint()
         # 파서 참조 해제
         self.parser = None  # 메모리 해제를 위해 None으로 설정
         self.is_mounted = False
         self.set_log_path(None)
-        
-        # 가비지 컬렉션 강제 실행
-        gc.collect()
-        
-        # after_cancel을 사용하여 스케줄러 중지
-        if self.root and self.after_id:
-            self.root.after_cancel(self.after_id)
-            self.after_id = None
+
+    def metrics_json(self):
+        """메트릭 엔드포인트용 지연 시간 히스토그램과 전송 통계"""
+        data = self.metrics.to_dict()
+        data["sender"] = self.api_sender.get_stats()
+        if self.profiler.enabled:
+            data["profile"] = self.profiler.get_stats()
+        return data
+
+    def metrics_text(self):
+        """메트릭 엔드포인트용 Prometheus 텍스트 (지연 시간 히스토그램과 전송 통계)"""
+        stats = self.api_sender.get_stats()
+        lines = [
+            "# HELP hs_tracker_sender_total Snapshots handled by the API sender",
+            "# TYPE hs_tracker_sender_total counter",
+        ]
+        for name, value in stats.items():
+            if name != "breakers":
+                lines.append(f'hs_tracker_sender_total{{result="{name}"}} {value}')
+        return self.metrics.to_prometheus() + "\n".join(lines) + "\n"
+
+    def start_metrics_server(self, port):
+        """
+        로컬 메트릭 엔드포인트 시작 (http://127.0.0.1:port/metrics)
+
+        Args:
+            port (int): 사용할 포트 (0이면 시작하지 않음)
+        """
+        if not port or self.metrics_server is not None:
+            return
+        server = MetricsServer(self.metrics_text, self.metrics_json, port)
+        if server.start():
+            self.metrics_server = server
+            if self.callback:
+                self.callback(f"메트릭 엔드포인트: http://127.0.0.1:{server.port}/metrics")
 
     def set_root(self, root):
         """루트 윈도우 설정"""
-        self.root = root
\ No newline at end of file
+        self.root = root
@@ -0,0 +1,278 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 지연 시간 히스토그램 구간 상한 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# 스냅샷 처리 단계: (이름, 시작 시각 키, 끝 시각 키, GUI 표시 이름)
+# log: 가장 최근 줄의 Power.log 타임스탬프, read: 파일에서 읽은 시각,
+# parsed: 파싱 완료 시각, exported: 카드 추출 완료 시각,
+# sent: API 요청 시작 시각, acked: API 응답 수신 시각
+STAGES = (
+    ("read", "log", "read", "읽기"),
+    ("parse", "read", "parsed", "파싱"),
+    ("export", "parsed", "exported", "추출"),
+    ("queue", "exported", "sent", "대기"),
+    ("send", "sent", "acked", "전송"),
+    ("total", "log", "acked", "전체"),
+)
+
+# 메트릭 엔드포인트 기본 포트 (127.0.0.1에만 바인딩, 0이면 사용 안 함)
+DEFAULT_METRICS_PORT = 8787
+
+
+def parse_log_time(line, now=None):
+    """
+    Power.log 한 줄의 타임스탬프를 현재 날짜 기준 epoch 시각으로 변환
+
+    로그에는 시각만 기록되므로, 변환한 시각이 현재보다 크게 미래이면
+    자정을 넘기기 전에 기록된 줄로 보고 하루를 뺀다.
+
+    Args:
+        line (bytes | str): "D 02:59:14.6088620 GameState..." 형태의 로그 줄
+        now (float): 기준 시각 (epoch 초, 기본값은 현재 시각)
+
+    Returns:
+        float: epoch 초, 타임스탬프가 없으면 None
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8", "replace")
+    parts = line.split(" ", 2)
+    if len(parts) < 2 or len(parts[0]) != 1:
+        return None
+    try:
+        # 소수점 이하는 마이크로초(6자리)까지만 사용
+        log_time = datetime.strptime(parts[1][:15], "%H:%M:%S.%f").time()
+    except ValueError:
+        return None
+
+    now = time.time() if now is None else now
+    current = datetime.fromtimestamp(now)
+    stamp = datetime.combine(current.date(), log_time)
+    if stamp - current > timedelta(hours=12):
+        stamp -= timedelta(days=1)
+    return stamp.timestamp()
+
+
+class LatencyHistogram:
+    """
+    누적 구간 카운트로 지연 시간 분포를 기록하는 히스토그램
+
+    값을 저장하지 않으므로 관측 횟수와 관계없이 메모리 사용량이 일정하다.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # 마지막 칸은 가장 큰 상한을 넘는 값 (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.last = None
+
+    def observe(self, value):
+        """지연 시간 하나 기록 (초)"""
+        value = max(0.0, value)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.last = value
+
+    def percentile(self, q):
+        """
+        구간 상한으로 근사한 백분위수
+
+        Args:
+            q (float): 0~1 사이 백분위
+
+        Returns:
+            float: 초 단위 근사값, 기록이 없으면 None
+        """
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self):
+        """히스토그램 상태를 딕셔너리로 변환"""
+        return {
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "last": self.last,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+        }
+
+
+class LatencyMetrics:
+    """
+    스냅샷 처리 단계별 지연 시간 히스토그램
+
+    감시 스레드와 전송 워커 스레드에서 함께 기록하므로 모든 접근은 lock으로 보호한다.
+    """
+
+    def __init__(self):
+        self.histograms = {name: LatencyHistogram() for name, _, _, _ in STAGES}
+        self.last_stamps = None
+        self.lock = threading.Lock()
+
+    def record(self, stamps):
+        """
+        스냅샷 하나의 단계별 시각을 히스토그램에 기록
+
+        시작/끝 시각이 모두 있는 단계만 기록한다 (전송이 생략된 스냅샷은 추출까지만).
+
+        Args:
+            stamps (dict): STAGES의 시각 키(log, read, parsed, ...)와 epoch 초
+        """
+        with self.lock:
+            for name, start, end, _ in STAGES:
+                if stamps.get(start) is not None and stamps.get(end) is not None:
+                    self.histograms[name].observe(stamps[end] - stamps[start])
+            self.last_stamps = dict(stamps)
+
+    def summary(self):
+        """
+        GUI 표시용 단계별 요약
+
+        Returns:
+            list: (표시 이름, p50, p95, 마지막 값) 튜플 목록 (초 단위, 기록이 없으면 None)
+        """
+        summary = []
+        with self.lock:
+            for name, _, _, label in STAGES:
+                hist = self.histograms[name]
+                summary.append((label, hist.percentile(0.5), hist.percentile(0.95), hist.last))
+        return summary
+
+    def format_histograms(self, width=30):
+        """단계별 히스토그램을 텍스트 막대그래프로 변환 (GUI 표시용)"""
+        lines = []
+        with self.lock:
+            for name, _, _, label in STAGES:
+                hist = self.histograms[name]
+                lines.append(f"[{label}] {hist.count}회, 최대 {hist.max * 1000:.1f}ms")
+                peak = max(hist.counts) or 1
+                bounds = [f"≤{b * 1000:g}ms" for b in hist.buckets] + ["초과"]
+                for bound, count in zip(bounds, hist.counts):
+                    bar = "#" * round(count / peak * width)
+                    lines.append(f"  {bound:>9} {count:>6} {bar}")
+                lines.append("")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        """전체 메트릭을 딕셔너리로 변환 (JSON 엔드포인트용)"""
+        with self.lock:
+            return {
+                "stages": {name: hist.to_dict() for name, hist in self.histograms.items()},
+                "last_stamps": self.last_stamps,
+            }
+
+    def to_prometheus(self, prefix="hs_tracker"):
+        """전체 메트릭을 Prometheus 텍스트 형식으로 변환"""
+        metric = f"{prefix}_stage_latency_seconds"
+        lines = [
+            f"# HELP {metric} Latency of each snapshot stage from Power.log line to API delivery",
+            f"# TYPE {metric} histogram",
+        ]
+        with self.lock:
+            for name, hist in self.histograms.items():
+                cumulative = 0
+                for bound, count in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{name}"}} {hist.sum}')
+                lines.append(f'{metric}_count{{stage="{name}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    """/metrics (Prometheus 텍스트)와 /metrics.json 요청 처리"""
+
+    def do_GET(self):
+        server = self.server
+        try:
+            if self.path == "/metrics":
+                body = server.text_func().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path == "/metrics.json":
+                body = json.dumps(server.json_func()).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 요청마다 콘솔에 출력하지 않음
+        pass
+
+
+class MetricsServer:
+    """
+    로컬 메트릭 HTTP 엔드포인트
+
+    127.0.0.1에만 바인딩하므로 같은 PC에서만 접근할 수 있다.
+    """
+
+    def __init__(self, text_func, json_func, port=DEFAULT_METRICS_PORT, host="127.0.0.1"):
+        self.text_func = text_func
+        self.json_func = json_func
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        """
+        서버 스레드 시작
+
+        Returns:
+            bool: 시작했으면 True (포트를 사용할 수 없으면 False)
+        """
+        if self.httpd is not None:
+            return True
+        try:
+            self.httpd = ThreadingHTTPServer((self.host, self.port), _MetricsRequestHandler)
+        except OSError as e:
+            print(f"메트릭 서버를 시작할 수 없습니다 ({self.host}:{self.port}): {str(e)}")
+            self.httpd = None
+            return False
+        self.httpd.daemon_threads = True
+        self.httpd.text_func = self.text_func
+        self.httpd.json_func = self.json_func
+        # 포트 0으로 시작하면 실제로 할당된 포트 사용
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """서버 중지"""
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
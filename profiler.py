@@ -0,0 +1,285 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from logging.handlers import RotatingFileHandler
+
+# 프로파일링 모드
+# off: 사용 안 함, timers: 단계별 시간만 측정,
+# cprofile: N틱마다 한 틱을 cProfile로 기록, tracemalloc: N틱마다 메모리 할당 상위 항목 기록
+PROFILE_MODES = ("off", "timers", "cprofile", "tracemalloc")
+
+# settings.ini보다 우선하는 환경 변수 (예: HS_TRACKER_PROFILE=cprofile:20)
+PROFILE_ENV = "HS_TRACKER_PROFILE"
+
+# 기본 기록 주기 (전체 틱 수, 5초 주기 기준 약 5분)
+DEFAULT_PROFILE_EVERY = 60
+
+# 기록 파일 (크기가 넘으면 .1, .2, ... 로 교체)
+PROFILE_FILE = "tick_profile.log"
+PROFILE_MAX_BYTES = 1 << 20
+PROFILE_BACKUP_COUNT = 3
+
+# 기록할 cProfile / tracemalloc 상위 항목 수
+PROFILE_TOP = 25
+
+# 틱 종류별 표시 이름 (전체 주기와 변경 알림 주기는 하는 일이 달라 따로 집계)
+TICK_SCOPES = {"full": "전체 주기", "change": "변경 알림 주기"}
+
+
+class _StageTimer:
+    """단계 하나의 실행 시간을 재는 컨텍스트 매니저"""
+
+    __slots__ = ("profiler", "scope", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.scope = profiler.scope
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add_timing(self.scope, self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullContext:
+    """프로파일링이 꺼져 있을 때 사용하는 빈 컨텍스트 매니저"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+class TickProfiler:
+    """
+    감시 틱의 단계별 실행 시간 측정과 주기적인 cProfile/tracemalloc 기록
+
+    스트리머 PC에서 디버거 없이 방송 중 느려지는 원인을 찾기 위한 용도로,
+    꺼져 있을 때는 단계마다 빈 컨텍스트 매니저만 사용하므로 부담이 거의 없다.
+    단계별 시간과 프로파일 결과는 N틱마다 크기 제한이 있는 파일에 기록한다.
+    """
+
+    def __init__(self, path=PROFILE_FILE):
+        self.path = path
+        self.mode = "off"
+        self.every = DEFAULT_PROFILE_EVERY
+        self.ticks = 0
+        # 지금 실행 중인 틱 종류 (TICK_SCOPES의 키)
+        self.scope = "full"
+        # {틱 종류: {단계 이름: [횟수, 합계, 최대]}}
+        self.timings = {}
+        self.last_timings = {}
+        self.lock = threading.Lock()
+        self.logger = None
+        self.last_snapshot = None
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def configure(self, mode="off", every=DEFAULT_PROFILE_EVERY):
+        """
+        프로파일링 모드 설정 (환경 변수 HS_TRACKER_PROFILE가 있으면 그 값을 우선 사용)
+
+        Args:
+            mode (str): PROFILE_MODES 중 하나
+            every (int): 기록 주기 (전체 틱 수)
+
+        Returns:
+            str: 실제로 적용된 모드
+        """
+        env = os.environ.get(PROFILE_ENV)
+        if env:
+            mode, _, env_every = env.partition(":")
+            if env_every:
+                every = env_every
+        mode = (mode or "off").strip().lower()
+        if mode not in PROFILE_MODES:
+            print(f"알 수 없는 프로파일링 모드입니다: {mode}")
+            mode = "off"
+        try:
+            every = max(1, int(every))
+        except (TypeError, ValueError):
+            every = DEFAULT_PROFILE_EVERY
+
+        if mode == "tracemalloc" and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif mode != "tracemalloc" and self.mode == "tracemalloc" and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.last_snapshot = None
+
+        self.mode = mode
+        self.every = every
+        self.ticks = 0
+        with self.lock:
+            self.timings = {}
+        return mode
+
+    def stage(self, name):
+        """
+        단계 실행 시간을 재는 컨텍스트 매니저 반환
+
+        Args:
+            name (str): 단계 이름 (예: "parse_log_file")
+        """
+        if self.mode == "off":
+            return _NULL_CONTEXT
+        return _StageTimer(self, name)
+
+    def add_timing(self, scope, name, seconds):
+        """단계 실행 시간 하나 기록"""
+        with self.lock:
+            timings = self.timings.setdefault(scope, {})
+            timing = timings.get(name)
+            if timing is None:
+                timings[name] = [1, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = max(timing[2], seconds)
+
+    def run_tick(self, func, *args, **kwargs):
+        """
+        전체 틱 하나 실행 (기록 주기가 된 틱은 cProfile로 감싸고 결과를 파일에 기록)
+
+        Args:
+            func (callable): 실행할 틱 함수
+        """
+        if self.mode == "off":
+            return func(*args, **kwargs)
+
+        self.ticks += 1
+        dump = self.ticks % self.every == 0
+        profile = None
+        if dump and self.mode == "cprofile":
+            profile = cProfile.Profile()
+        try:
+            with self.stage("tick"):
+                if profile is not None:
+                    return profile.runcall(func, *args, **kwargs)
+                return func(*args, **kwargs)
+        finally:
+            if dump:
+                try:
+                    self.dump(profile)
+                except Exception as e:
+                    print(f"프로파일 기록 오류: {str(e)}")
+
+    def run_change_tick(self, func, *args, **kwargs):
+        """
+        변경 알림으로 실행되는 틱 하나 실행 (단계별 시간은 전체 주기와 따로 집계)
+
+        Args:
+            func (callable): 실행할 틱 함수
+        """
+        if self.mode == "off":
+            return func(*args, **kwargs)
+
+        self.scope = "change"
+        try:
+            with self.stage("tick"):
+                return func(*args, **kwargs)
+        finally:
+            self.scope = "full"
+
+    def format_timings(self, timings=None):
+        """틱 종류별 단계별 시간을 텍스트로 변환"""
+        if timings is None:
+            timings = self.last_timings
+        lines = []
+        for scope, label in TICK_SCOPES.items():
+            stages = timings.get(scope)
+            if not stages:
+                continue
+            ticks = stages["tick"][0] if "tick" in stages else 0
+            lines.append(f"[{label}, {ticks}틱]")
+            for name, (count, total, peak) in stages.items():
+                lines.append(
+                    f"  {name:<22} {count:>6}회  평균 {total / count * 1000:8.2f}ms  "
+                    f"최대 {peak * 1000:8.2f}ms  합계 {total:8.3f}s"
+                )
+        return "\n".join(lines)
+
+    def get_stats(self):
+        """마지막 기록 구간의 틱 종류별 단계별 시간 (메트릭 엔드포인트용, 밀리초)"""
+        with self.lock:
+            timings = {scope: dict(stages) for scope, stages in self.last_timings.items()}
+        return {
+            scope: {
+                name: {"count": count, "avg_ms": total / count * 1000, "max_ms": peak * 1000}
+                for name, (count, total, peak) in stages.items()
+            }
+            for scope, stages in timings.items()
+        }
+
+    def dump(self, profile=None):
+        """
+        지난 기록 구간의 단계별 시간과 프로파일 결과를 파일에 기록
+
+        Args:
+            profile (cProfile.Profile): 이번 틱의 cProfile 결과 (없으면 생략)
+        """
+        with self.lock:
+            timings, self.timings = self.timings, {}
+            self.last_timings = timings
+
+        sections = [
+            f"===== {time.strftime('%Y-%m-%d %H:%M:%S')} "
+            f"({self.mode}, 최근 전체 주기 {self.every}틱) =====",
+            self.format_timings(timings),
+        ]
+        if profile is not None:
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            sections.append(out.getvalue().strip())
+        if self.mode == "tracemalloc" and tracemalloc.is_tracing():
+            sections.append(self.format_tracemalloc())
+        self._get_logger().info("\n".join(sections) + "\n")
+
+    def format_tracemalloc(self):
+        """현재 메모리 할당 상위 항목과 지난 기록 이후 증가량을 텍스트로 변환"""
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"tracemalloc: 현재 {current / 1024 ** 2:.1f}MiB, 최대 {peak / 1024 ** 2:.1f}MiB"]
+        lines.extend(f"  {stat}" for stat in snapshot.statistics("lineno")[:PROFILE_TOP])
+        if self.last_snapshot is not None:
+            lines.append("지난 기록 이후 증가:")
+            diff = snapshot.compare_to(self.last_snapshot, "lineno")
+            lines.extend(f"  {stat}" for stat in diff[:PROFILE_TOP])
+        self.last_snapshot = snapshot
+        return "\n".join(lines)
+
+    def _get_logger(self):
+        """크기 제한이 있는 기록 파일 로거 (처음 기록할 때 생성)"""
+        if self.logger is None:
+            logger = logging.getLogger(f"hs_tracker.profile.{id(self)}")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(
+                self.path,
+                maxBytes=PROFILE_MAX_BYTES,
+                backupCount=PROFILE_BACKUP_COUNT,
+                encoding="utf-8",
+            )
+            logger.addHandler(handler)
+            self.logger = logger
+        return self.logger
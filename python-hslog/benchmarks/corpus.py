@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""
+Build a deterministic synthetic Power.log out of the fragments in tests/data.py.
+
+Every turn replays the test fragments with fresh entity ids (each one created by a
+FULL_ENTITY first, so the exporters can resolve them) and a monotonic clock. A new
+game is started every --turns turns. The same size and seed always produce the
+same bytes, so results can be compared across commits.
+
+Usage: python benchmarks/corpus.py [--seed N] [--turns N] SIZE OUTPUT
+"""
+import os
+import re
+import sys
+from argparse import ArgumentParser
+from random import Random
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests import data  # noqa: E402
+
+
+LINE_RE = re.compile(r"^[DWE] [\d:.]+ (\S+) - (.*)$")
+ENTITY_ID_RE = re.compile(r"\b(id|ID|Entity|Source)=(\d+)|(tag=ENTITY_ID value=)(\d+)")
+SIZE_RE = re.compile(r"^(\d+(?:\.\d+)?)\s*([KMG]?)B?$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+# Player names only resolve once the game has seen them; the fragments use names
+# from different games, so those lines are left out.
+SKIPPED_NAMES = ("Entity=Doomflow", "entity=BehEh", "entity=The Innkeeper")
+FIRST_ENTITY_ID = 4
+
+
+def parse_size(size):
+	"""
+	Parse a human readable size such as "1M", "500MB" or "2048" into bytes.
+	"""
+	sre = SIZE_RE.match(size.strip())
+	if not sre:
+		raise ValueError("Invalid size: %r" % (size))
+	value, unit = sre.groups()
+	return int(float(value) * SIZE_UNITS[unit.upper()])
+
+
+def _fragment(text, skip_corrupt=False):
+	ret = []
+	depth = 0
+	for line in text.splitlines():
+		if any(name in line for name in SKIPPED_NAMES):
+			continue
+		if skip_corrupt and "\x00" in line:
+			continue
+		method, body = LINE_RE.match(line).groups()
+		if body.lstrip().startswith("BLOCK_START"):
+			depth += 1
+		elif body.lstrip().startswith("BLOCK_END"):
+			depth -= 1
+		ret.append((method, body))
+
+	# Some fragments are cut off mid-block; close them so turns stay balanced.
+	for i in range(depth, 0, -1):
+		ret.append(("GameState.DebugPrintPower()", "    " * (i - 1) + "BLOCK_END"))
+	return ret
+
+
+# (method, data) pairs, timestamps stripped
+FULL_ENTITY = _fragment(data.FULL_ENTITY)
+TURN_FRAGMENTS = [_fragment(text, skip_corrupt=True) for text in (
+	data.CONTROLLER_CHANGE,
+	data.UNROUNDABLE_TIMESTAMP + "\n" + data.REPEATED_TIMESTAMP,
+	data.SUB_SPELL_BLOCK,
+	data.BGS_SUB_SPELL_BLOCK,
+	data.MERCENARIES_SUB_SPELL_BLOCK,
+	data.CACHED_TAG_FOR_DORMANT_CHANGE_SHORT_ENTITY,
+	data.CORRUPT_SHOW_ENTITY,
+	data.VO_SPELL,
+	data.SHUFFLE_DECK,
+	data.OPTIONS_WITH_ERRORS,
+)]
+# Both players get a real account so FriendlyPlayerExporter cannot pick the
+# non-AI player outright. No card is ever revealed into a hand either, which makes
+# it scan every game to the end: the worst case.
+INITIAL_GAME = _fragment(data.INITIAL_GAME.replace("[hi=1 lo=0]", "[hi=1 lo=1]"))
+
+
+def _fragment_entities(fragment):
+	ret = []
+	for method, line in fragment:
+		if line.startswith("id="):
+			# Option block id, not an entity
+			continue
+		for sre in ENTITY_ID_RE.finditer(line):
+			entity_id = int(sre.group(2) or sre.group(4))
+			if entity_id >= FIRST_ENTITY_ID and entity_id not in ret:
+				ret.append(entity_id)
+	return ret
+
+
+def _remap(line, ids):
+	if line.startswith("id="):
+		return line
+
+	def sub(sre):
+		if sre.group(1):
+			key, entity_id = sre.group(1) + "=", sre.group(2)
+		else:
+			key, entity_id = sre.group(3), sre.group(4)
+		return key + str(ids.get(int(entity_id), entity_id))
+
+	return ENTITY_ID_RE.sub(sub, line)
+
+
+class CorpusGenerator:
+	"""
+	Generate synthetic Power.log lines. Iterating yields newline-terminated lines.
+	"""
+	def __init__(self, size, seed=0, turns_per_game=80):
+		self.size = size
+		self.turns_per_game = turns_per_game
+		self.random = Random(seed)
+		# Clock in 100ns ticks, starting at 20:00:00
+		self.clock = 20 * 3600 * 10 ** 7
+		self.next_id = FIRST_ENTITY_ID
+		self.written = 0
+		self.lines = 0
+
+	def _timestamp(self):
+		self.clock += self.random.randint(1, 20000)
+		ticks = self.clock % (24 * 3600 * 10 ** 7)
+		seconds, fraction = divmod(ticks, 10 ** 7)
+		minutes, seconds = divmod(seconds, 60)
+		hours, minutes = divmod(minutes, 60)
+		return "%02d:%02d:%02d.%07d" % (hours, minutes, seconds, fraction)
+
+	def _line(self, method, line):
+		ret = "D %s %s - %s\n" % (self._timestamp(), method, line)
+		self.written += len(ret)
+		self.lines += 1
+		return ret
+
+	def _game(self):
+		self.next_id = FIRST_ENTITY_ID
+		for method, line in INITIAL_GAME:
+			yield self._line(method, line)
+
+	def _turn(self):
+		fragments = TURN_FRAGMENTS[:]
+		self.random.shuffle(fragments)
+		for fragment in fragments:
+			ids = {}
+			for entity_id in _fragment_entities(fragment):
+				ids[entity_id] = self.next_id
+				ids_full_entity = {FIRST_ENTITY_ID: self.next_id}
+				for method, line in FULL_ENTITY:
+					yield self._line(method, _remap(line, ids_full_entity))
+				self.next_id += 1
+			for method, line in fragment:
+				yield self._line(method, _remap(line, ids))
+
+	def __iter__(self):
+		while self.written < self.size:
+			yield from self._game()
+			for turn in range(self.turns_per_game):
+				yield from self._turn()
+				if self.written >= self.size:
+					return
+			yield self._line(
+				"GameState.DebugPrintPower()",
+				"TAG_CHANGE Entity=GameEntity tag=STATE value=COMPLETE"
+			)
+
+
+def write_corpus(path, size, seed=0, turns_per_game=80):
+	"""
+	Write a synthetic log of at least `size` bytes to `path`.
+	Returns the number of lines written.
+	"""
+	generator = CorpusGenerator(size, seed=seed, turns_per_game=turns_per_game)
+	with open(path, "w", encoding="utf-8", newline="\n") as f:
+		f.writelines(generator)
+	return generator.lines
+
+
+def main():
+	p = ArgumentParser(description=__doc__.strip().splitlines()[0])
+	p.add_argument("size", help="Target size, eg. 1M or 500MB")
+	p.add_argument("output")
+	p.add_argument("--seed", type=int, default=0)
+	p.add_argument("--turns", type=int, default=80, help="Turns per game")
+	args = p.parse_args()
+
+	lines = write_corpus(args.output, parse_size(args.size), args.seed, args.turns)
+	print("%s: %i lines, %i bytes" % (args.output, lines, os.path.getsize(args.output)))
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
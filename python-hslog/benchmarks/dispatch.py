@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Measure the per-line cost of Power.log parsing, broken down by PowerHandler opcode.
+
+Usage: python benchmarks/dispatch.py [--repeat N] POWER_LOG [POWER_LOG ...]
+"""
+import sys
+from argparse import ArgumentParser
+from collections import Counter
+from time import perf_counter_ns
+
+from hslog import LogParser
+
+
+def run(lines, opcode_time, opcode_count):
+	parser = LogParser()
+	handler = parser._power_handler
+	handle_power = handler.handle_power
+
+	def timed_handle_power(ps, ts, opcode, data):
+		start = perf_counter_ns()
+		try:
+			return handle_power(ps, ts, opcode, data)
+		finally:
+			opcode_time[opcode] += perf_counter_ns() - start
+			opcode_count[opcode] += 1
+
+	handler.handle_power = timed_handle_power
+
+	start = perf_counter_ns()
+	for line in lines:
+		parser.read_line(line)
+	return perf_counter_ns() - start
+
+
+def main():
+	p = ArgumentParser(description=__doc__.strip().splitlines()[0])
+	p.add_argument("files", nargs="+", metavar="POWER_LOG")
+	p.add_argument("--repeat", type=int, default=5)
+	args = p.parse_args()
+
+	lines = []
+	for path in args.files:
+		with open(path, encoding="utf-8") as f:
+			lines.extend(f)
+
+	opcode_time, opcode_count = Counter(), Counter()
+	best = min(run(lines, opcode_time, opcode_count) for _ in range(args.repeat))
+
+	print("%i lines, best of %i: %.3fs (%.2f us/line, %.0f lines/s)" % (
+		len(lines), args.repeat, best / 1e9, best / 1e3 / len(lines), len(lines) / best * 1e9
+	))
+	print()
+	print("%-32s %10s %12s" % ("opcode", "lines", "ns/line"))
+	for opcode, count in opcode_count.most_common():
+		print("%-32s %10i %12.0f" % (
+			opcode, count // args.repeat, opcode_time[opcode] / count
+		))
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
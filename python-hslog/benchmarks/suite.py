@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+"""
+Measure throughput, peak RSS and allocations of python-hslog over Power.log corpora.
+
+Each target runs in a fresh interpreter so peak RSS is not shared between runs:
+
+- parse: LogParser.read
+- export: EntityTreeExporter.export, for every game (parsing is not timed)
+- friendly: FriendlyPlayerExporter.export, for every game (parsing is not timed)
+- filter: BattlegroundsLogFilter, iterated to the end
+
+Synthetic corpora of the requested --sizes are generated with benchmarks/corpus.py
+and cached in --cache-dir; recorded logs can be passed as extra arguments.
+Timings are the best of --repeat runs. Allocations are measured with tracemalloc in
+a separate run, so they do not skew the timings.
+
+Usage: python benchmarks/suite.py [--sizes 1M,10M,100M,500M] [--repeat N]
+[--targets parse,export,friendly,filter] [--json OUT] [--compare BASELINE] [POWER_LOG ...]
+"""
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+from argparse import SUPPRESS, ArgumentParser
+from tempfile import gettempdir
+from time import perf_counter
+
+from corpus import parse_size, write_corpus
+
+from hslog import LogParser
+from hslog.export import EntityTreeExporter, FriendlyPlayerExporter
+from hslog.filter import BattlegroundsLogFilter
+
+
+try:
+	import resource
+except ImportError:
+	# Not available on Windows
+	resource = None
+
+
+TARGETS = ("parse", "export", "friendly", "filter")
+MIB = 1024 ** 2
+
+
+def _parse(path):
+	parser = LogParser()
+	with open(path, encoding="utf-8") as f:
+		parser.read(f)
+	parser.flush()
+	return parser
+
+
+def _export_games(games, exporter):
+	for packet_tree in games:
+		exporter(packet_tree).export()
+
+
+def prepare(target, path):
+	"""
+	Return a callable running `target` over the log at `path`. Any setup the
+	target needs (eg. parsing the log before exporting it) happens here, untimed.
+	"""
+	if target == "parse":
+		return lambda: _parse(path)
+	elif target == "export":
+		games = _parse(path).games
+		return lambda: _export_games(games, EntityTreeExporter)
+	elif target == "friendly":
+		games = _parse(path).games
+
+		def run():
+			for packet_tree in games:
+				# The result is cached on the packet tree
+				packet_tree.friendly_player = None
+			_export_games(games, FriendlyPlayerExporter)
+
+		return run
+	elif target == "filter":
+		def run():
+			with open(path, encoding="utf-8") as f:
+				for line in BattlegroundsLogFilter(f):
+					pass
+
+		return run
+	raise ValueError("Unknown target: %r" % (target))
+
+
+def peak_rss():
+	"""
+	Peak resident set size of this process in bytes, or None if unknown.
+	"""
+	if resource is None:
+		return None
+	rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# ru_maxrss is in bytes on macOS, in kilobytes everywhere else
+	return rss if sys.platform == "darwin" else rss * 1024
+
+
+def worker(target, path, trace):
+	run = prepare(target, path)
+	ret = {}
+	if trace:
+		tracemalloc.start()
+		before = tracemalloc.get_traced_memory()[0]
+		result = run()
+		current, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		ret["alloc_peak"] = peak - before
+		ret["alloc_retained"] = current - before
+	else:
+		start = perf_counter()
+		result = run()
+		ret["seconds"] = perf_counter() - start
+		ret["peak_rss"] = peak_rss()
+	del result
+	json.dump(ret, sys.stdout)
+	return 0
+
+
+def spawn(target, path, trace=False):
+	args = [sys.executable, os.path.abspath(__file__), "--worker", target, path]
+	if trace:
+		args.append("--trace")
+	output = subprocess.check_output(args)
+	return json.loads(output)
+
+
+def count_lines(path):
+	with open(path, "rb") as f:
+		return sum(1 for line in f)
+
+
+def get_corpora(args):
+	ret = []
+	if args.sizes:
+		os.makedirs(args.cache_dir, exist_ok=True)
+	for size in filter(None, args.sizes.split(",")):
+		path = os.path.join(args.cache_dir, "synthetic-%s-seed%i.log" % (
+			size.upper(), args.seed
+		))
+		if not os.path.exists(path):
+			print("Generating %s..." % (path), file=sys.stderr)
+			write_corpus(path + ".tmp", parse_size(size), seed=args.seed)
+			os.replace(path + ".tmp", path)
+		ret.append(("synthetic-" + size.upper(), path))
+	for path in args.files:
+		ret.append((os.path.basename(path), path))
+	return ret
+
+
+def benchmark(name, path, target, repeat):
+	timings = [spawn(target, path) for _ in range(repeat)]
+	allocs = spawn(target, path, trace=True)
+	lines = count_lines(path)
+	seconds = min(t["seconds"] for t in timings)
+	rss = [t["peak_rss"] for t in timings if t["peak_rss"] is not None]
+	return {
+		"corpus": name,
+		"target": target,
+		"bytes": os.path.getsize(path),
+		"lines": lines,
+		"seconds": seconds,
+		"lines_per_second": lines / seconds if seconds else None,
+		"peak_rss": max(rss) if rss else None,
+		"alloc_peak": allocs["alloc_peak"],
+		"alloc_retained": allocs["alloc_retained"],
+	}
+
+
+def _mib(value):
+	return "%.1f" % (value / MIB) if value is not None else "-"
+
+
+def print_results(results, baseline):
+	print("%-24s %-8s %8s %10s %9s %11s %9s %9s %9s %8s" % (
+		"corpus", "target", "MiB", "lines", "best s", "lines/s",
+		"RSS MiB", "peak MiB", "kept MiB", "vs base",
+	))
+	for result in results:
+		base = baseline.get((result["corpus"], result["target"]))
+		speedup = "%.2fx" % (base["seconds"] / result["seconds"]) if base else "-"
+		print("%-24s %-8s %8s %10i %9.3f %11.0f %9s %9s %9s %8s" % (
+			result["corpus"], result["target"], _mib(result["bytes"]), result["lines"],
+			result["seconds"], result["lines_per_second"] or 0, _mib(result["peak_rss"]),
+			_mib(result["alloc_peak"]), _mib(result["alloc_retained"]), speedup,
+		))
+
+
+def main():
+	p = ArgumentParser(description=__doc__.strip().splitlines()[0])
+	p.add_argument("files", nargs="*", metavar="POWER_LOG")
+	p.add_argument("--sizes", default="1M,10M,100M", help="Synthetic corpus sizes")
+	p.add_argument("--targets", default=",".join(TARGETS))
+	p.add_argument("--repeat", type=int, default=3)
+	p.add_argument("--seed", type=int, default=0)
+	p.add_argument(
+		"--cache-dir", default=os.path.join(gettempdir(), "hslog-benchmarks"),
+		help="Where generated corpora are kept between runs"
+	)
+	p.add_argument("--json", metavar="OUTPUT", help="Write the results to a JSON file")
+	p.add_argument("--compare", metavar="BASELINE", help="JSON results to compare with")
+	p.add_argument("--worker", nargs=2, metavar=("TARGET", "PATH"), help=SUPPRESS)
+	p.add_argument("--trace", action="store_true", help=SUPPRESS)
+	args = p.parse_args()
+
+	if args.worker:
+		return worker(*args.worker, trace=args.trace)
+
+	targets = args.targets.split(",")
+	for target in targets:
+		if target not in TARGETS:
+			p.error("Unknown target %r (choose from %s)" % (target, ", ".join(TARGETS)))
+
+	baseline = {}
+	if args.compare:
+		with open(args.compare) as f:
+			for result in json.load(f):
+				baseline[(result["corpus"], result["target"])] = result
+
+	results = []
+	for name, path in get_corpora(args):
+		for target in targets:
+			print("Running %s on %s..." % (target, name), file=sys.stderr)
+			results.append(benchmark(name, path, target, args.repeat))
+
+	print_results(results, baseline)
+
+	if args.json:
+		with open(args.json, "w") as f:
+			json.dump(results, f, indent="\t")
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
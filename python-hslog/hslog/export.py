@@ -1,6 +1,6 @@
-from typing import Dict, Optional, cast
+from typing import Dict, List, Optional, Tuple, cast
 
-from hearthstone.entities import Card, Game, Player
+from hearthstone.entities import Card, Entity, Game, Player
 from hearthstone.enums import BlockType, GameTag, Zone
 
 from . import packets
@@ -237,6 +237,46 @@ class EntityTreeExporter(BaseExporter):
 
 		self.player_manager = player_manager
 
+		# Entities keyed by (controller, zone), kept up to date while exporting so that
+		# zone lookups do not have to scan every entity in the game.
+		self._zone_index: Dict[Tuple[int, Zone], Dict[int, Entity]] = {}
+		self._zone_keys: Dict[int, Tuple[int, Zone]] = {}
+
+	def _index_entity(self, entity: Entity) -> None:
+		key = (entity.tags.get(GameTag.CONTROLLER, 0), entity.zone)
+		old_key = self._zone_keys.get(entity.id)
+		if old_key == key:
+			return
+		if old_key is not None:
+			del self._zone_index[old_key][entity.id]
+		self._zone_index.setdefault(key, {})[entity.id] = entity
+		self._zone_keys[entity.id] = key
+
+	def _reindex(self) -> None:
+		self._zone_index.clear()
+		self._zone_keys.clear()
+		for entity in self.game.entities:
+			self._index_entity(entity)
+
+	def find_entities_by_zone(
+		self, controller: Optional[int] = None, zone: Optional[Zone] = None
+	) -> List[Entity]:
+		"""
+		Return the exported entities with the given controller (player id) and zone,
+		in entity id order. Either filter may be omitted.
+		"""
+		if controller is not None and zone is not None:
+			buckets = [self._zone_index.get((controller, zone), {})]
+		else:
+			buckets = [
+				bucket for (bucket_controller, bucket_zone), bucket in self._zone_index.items()
+				if controller in (None, bucket_controller) and zone in (None, bucket_zone)
+			]
+
+		entities = [entity for bucket in buckets for entity in bucket.values()]
+		entities.sort(key=lambda entity: entity.id)
+		return entities
+
 	def find_entity(self, entity_id: int, opcode) -> Card:
 		try:
 			entity = self.game.find_entity_by_id(entity_id)
@@ -250,14 +290,19 @@ class EntityTreeExporter(BaseExporter):
 			)
 		return cast(Card, entity)
 
+	def _reset_game(self) -> None:
+		self.game.reset()
+		self._reindex()
+
 	def handle_block(self, packet):
 		if packet.type == BlockType.GAME_RESET:
-			self.game.reset()
+			self._reset_game()
 		super().handle_block(packet)
 
 	def handle_create_game(self, packet):
 		self.game = self.game_class(packet.entity)
 		self.game.create(packet.tags)
+		self._index_entity(self.game)
 		for player in packet.players:
 			self.export_packet(player)
 		return self.game
@@ -282,6 +327,7 @@ class EntityTreeExporter(BaseExporter):
 		entity.tags = dict(packet.tags)
 		self.game.register_entity(entity)
 		entity.initial_hero_entity_id = entity.tags.get(GameTag.HERO_ENTITY, 0)
+		self._index_entity(entity)
 		return entity
 
 	def handle_full_entity(self, packet):
@@ -294,11 +340,13 @@ class EntityTreeExporter(BaseExporter):
 		if existing_entity is not None:
 			existing_entity.card_id = packet.card_id
 			existing_entity.tags = dict(packet.tags)
+			self._index_entity(existing_entity)
 			return existing_entity
 
 		entity = self.card_class(int(entity_id), packet.card_id)
 		entity.tags = dict(packet.tags)
 		self.game.register_entity(entity)
+		self._index_entity(entity)
 		return entity
 
 	def handle_hide_entity(self, packet):
@@ -309,6 +357,7 @@ class EntityTreeExporter(BaseExporter):
 	def handle_show_entity(self, packet):
 		entity = self.find_entity(packet.entity, "SHOW_ENTITY")
 		entity.reveal(packet.card_id, dict(packet.tags))
+		self._index_entity(entity)
 		return entity
 
 	def handle_change_entity(self, packet):
@@ -321,21 +370,90 @@ class EntityTreeExporter(BaseExporter):
 				f"CHANGE_ENTITY {packet.entity} to {packet.card_id} with no previous known CardID."
 			)
 		entity.change(packet.card_id, dict(packet.tags))
+		self._index_entity(entity)
 		return entity
 
 	def handle_tag_change(self, packet):
 		entity_id = coerce_to_entity_id(packet.entity)
 		entity = self.find_entity(int(entity_id), "TAG_CHANGE")
 		entity.tag_change(packet.tag, packet.value)
+		if packet.tag in (GameTag.ZONE, GameTag.CONTROLLER):
+			self._index_entity(entity)
 
 		return entity
 
 
+class IncrementalEntityTreeExporter(EntityTreeExporter):
+	"""
+	An EntityTreeExporter that keeps its Game between calls to export().
+
+	Every call to export() only applies the packets that were appended to the packet
+	tree since the previous call, so the cost of following a packet tree that is still
+	being parsed scales with the new packets rather than with the whole game.
+
+	Entity packets which can still receive initial tags (the last packet of a block
+	that is still open) are held back until the parser has moved past them.
+	"""
+
+	# Packets whose contents keep growing after they were registered
+	open_packet_types = (
+		packets.CreateGame, packets.FullEntity, packets.ShowEntity, packets.ChangeEntity
+	)
+
+	def __init__(self, packet_tree, player_manager: Optional[PlayerManager] = None):
+		super().__init__(packet_tree, player_manager=player_manager)
+
+		# One [packets, index of the next packet to export, container] frame per
+		# container that is currently being exported, outermost first.
+		self._stack = [[packet_tree.packets, 0, packet_tree]]
+
+	def _is_closed(self) -> bool:
+		# The innermost container is closed once it ended, or once the parser appended
+		# packets after it to any of its ancestors.
+		container = self._stack[-1][2]
+		if getattr(container, "ended", False):
+			return True
+		return any(index < len(node) for node, index, _ in self._stack[:-1])
+
+	def enter_block(self, packet):
+		if isinstance(packet, packets.Block) and packet.type == BlockType.GAME_RESET:
+			self._reset_game()
+
+	def export(self) -> "IncrementalEntityTreeExporter":
+		stack = self._stack
+		while True:
+			frame = stack[-1]
+			node, index = frame[0], frame[1]
+			if index < len(node):
+				packet = node[index]
+				if (
+					index == len(node) - 1 and
+					isinstance(packet, self.open_packet_types) and
+					not self._is_closed()
+				):
+					break
+				frame[1] = index + 1
+				if isinstance(packet, (packets.Block, packets.SubSpell)):
+					self.enter_block(packet)
+					stack.append([packet.packets, 0, packet])
+				else:
+					self.export_packet(packet)
+			elif len(stack) > 1 and self._is_closed():
+				stack.pop()
+			else:
+				break
+		self.flush()
+		return self
+
+
 class FriendlyPlayerExporter(BaseExporter):
 	"""
 	An exporter that will attempt to guess the friendly player in the game by
 	looking for initial unrevealed cards.
 	May produce incorrect results in spectator mode if both hands are revealed.
+
+	The friendly player never changes within a game, so once it is found it is stored
+	on the packet tree and returned directly by subsequent exports.
 	"""
 	def __init__(self, packet_tree):
 		super().__init__(packet_tree)
@@ -345,10 +463,15 @@ class FriendlyPlayerExporter(BaseExporter):
 		self._non_ai_players = []
 
 	def export(self):
+		if self.packet_tree.friendly_player is not None:
+			self.friendly_player = self.packet_tree.friendly_player
+			return self.friendly_player
+
 		for packet in self.packet_tree:
 			self.export_packet(packet)
 			if self.friendly_player is not None:
 				# Stop export once we have it
+				self.packet_tree.friendly_player = self.friendly_player
 				break
 		return self.friendly_player
 
@@ -5,7 +5,7 @@ from hearthstone.enums import GameTag
 
 from hslog import tokens
 from hslog.exceptions import CorruptLogError, RegexParsingError
-from hslog.utils import parse_tag
+from hslog.utils import parse_tag, powerlog_method_offset
 
 
 # List of TAG_CHANGE tags to discard/keep
@@ -56,6 +56,14 @@ BLACKLISTED_SHOW_ENTITY_TAGS = [
 ]
 
 
+# Methods whose lines BattlegroundsLogFilter looks into
+
+FILTERED_METHOD_PREFIXES = (
+    "GameState.DebugPrintPower()",
+    "GameState.DebugPrintOptions()",
+)
+
+
 class Buffer:
     """Represents a sequence of buffered log lines that might be emitted or skipped.
 
@@ -485,6 +493,13 @@ class BattlegroundsLogFilter(Iterable):
 
             self.num_lines_read += 1
 
+            # Only DebugPrintPower and DebugPrintOptions lines are filtered, pass every
+            # other line through without running the regexes below
+            start = powerlog_method_offset(line)
+            if start != -1 and not line.startswith(FILTERED_METHOD_PREFIXES, start):
+                self._emit_line(line)
+                continue
+
             sre = tokens.TIMESTAMP_RE.match(line)
             if not sre:
                 raise RegexParsingError(line)
@@ -503,18 +518,19 @@ class BattlegroundsLogFilter(Iterable):
             msg = msg.strip()
 
             if method == "GameState.DebugPrintPower":
-                opcode = msg.split()[0]
+                opcode = msg.split(None, 1)[0]
 
-                if opcode == "BLOCK_START":
-                    self._handle_block_start(msg, line)
-                elif opcode == "BLOCK_END":
-                    self._handle_block_end(line)
-                elif opcode in ["FULL_ENTITY", "SHOW_ENTITY"]:
-                    self._handle_entity(opcode, line)
-                elif opcode.startswith("tag="):
+                # Most frequent opcodes first
+                if opcode.startswith("tag="):
                     self._handle_entity_tag(msg, line)
                 elif opcode == "TAG_CHANGE":
                     self._handle_tag_change(msg, line)
+                elif opcode in ("FULL_ENTITY", "SHOW_ENTITY"):
+                    self._handle_entity(opcode, line)
+                elif opcode == "BLOCK_START":
+                    self._handle_block_start(msg, line)
+                elif opcode == "BLOCK_END":
+                    self._handle_block_end(line)
                 else:
                     self._emit_line(line)
 
@@ -1,12 +1,82 @@
+import weakref
+from array import array
+
 from hearthstone.enums import PowerType
 
+from .utils import LazyTimestamp, restore_tag
+
+
+def _get_ts(self):
+	ts = self._ts
+	if ts.__class__ is LazyTimestamp:
+		# Parsed on first access only, see LogParser(lazy_timestamps=True)
+		ts = self._ts = ts.resolve()
+	return ts
+
+
+def _set_ts(self, ts):
+	self._ts = ts
+
+
+def _get_parent(self):
+	parent = self._parent
+	if parent is not None:
+		return parent()
+
+
+def _set_parent(self, parent):
+	# A parent owns its children through its packets, so the back-reference is
+	# weak: packet trees then hold no reference cycles and are freed by refcounting
+	# alone, without waiting for the cyclic garbage collector.
+	self._parent = weakref.ref(parent) if parent is not None else None
+
+
+def _get_slot_state(self):
+	state = {}
+	for cls in self.__class__.__mro__:
+		for name in cls.__dict__.get("__slots__", ()):
+			if name != "__weakref__" and hasattr(self, name):
+				state[name] = getattr(self, name)
+	# Weak references cannot be pickled, the parent is pickled instead
+	state["_parent"] = self.parent
+	return state
+
+
+def _set_slot_state(self, state):
+	for name, value in state.items():
+		if name == "_parent":
+			self.parent = value
+		else:
+			setattr(self, name, value)
+
 
 class PacketTree:
-	def __init__(self, ts):
+	ts = property(_get_ts, _set_ts)
+	parent = property(_get_parent, _set_parent)
+
+	def __init__(self, ts, columnar_tag_changes: bool = False):
 		self.ts = ts
-		self.packets = []
+		if columnar_tag_changes:
+			self.tag_changes = TagChangeStore()
+			self.packets = PacketList(self.tag_changes)
+		else:
+			self.tag_changes = None
+			self.packets = []
 		self.parent = None
 		self.packet_counter = 0
+		# Set by FriendlyPlayerExporter once the friendly player is known
+		self.friendly_player = None
+
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		state["_parent"] = self.parent
+		return state
+
+	def __setstate__(self, state):
+		state = state.copy()
+		parent = state.pop("_parent", None)
+		self.__dict__.update(state)
+		self.parent = parent
 
 	def __iter__(self):
 		for packet in self.packets:
@@ -51,7 +121,11 @@ class PacketTree:
 
 
 class Packet:
+	# Logs hold hundreds of thousands of packets, so none of them get a __dict__.
+	# Subclasses must declare __slots__ for any attribute they add.
+	__slots__ = ("_ts", "packet_id")
 	power_type = 0
+	ts = property(_get_ts, _set_ts)
 
 	def __repr__(self):
 		return "<%s>" % self.__class__.__name__
@@ -59,6 +133,13 @@ class Packet:
 
 class Block(Packet):
 	power_type = PowerType.BLOCK_START
+	__slots__ = (
+		"entity", "type", "index", "effectid", "effectindex", "target", "suboption",
+		"trigger_keyword", "ended", "packets", "_parent", "__weakref__",
+	)
+	parent = property(_get_parent, _set_parent)
+	__getstate__ = _get_slot_state
+	__setstate__ = _set_slot_state
 
 	def __init__(
 		self, ts, entity, type, index, effectid, effectindex, target, suboption, trigger_keyword
@@ -74,6 +155,7 @@ class Block(Packet):
 		self.trigger_keyword = trigger_keyword
 		self.ended = False
 		self.packets = []
+		self.parent = None
 
 	def __iter__(self):
 		for packet in self.packets:
@@ -94,6 +176,7 @@ class Block(Packet):
 
 class MetaData(Packet):
 	power_type = PowerType.META_DATA
+	__slots__ = ("meta", "data", "count", "info")
 
 	def __init__(self, ts, meta, data, count):
 		self.ts = ts
@@ -108,8 +191,11 @@ class MetaData(Packet):
 
 class CreateGame(Packet):
 	power_type = PowerType.CREATE_GAME
+	__slots__ = ("entity", "tags", "players")
 
 	class Player(Packet):
+		__slots__ = ("entity", "player_id", "hi", "lo", "tags", "name")
+
 		def __init__(self, ts, entity, player_id, hi, lo):
 			self.ts = ts
 			self.entity = entity
@@ -128,6 +214,7 @@ class CreateGame(Packet):
 
 class HideEntity(Packet):
 	power_type = PowerType.HIDE_ENTITY
+	__slots__ = ("entity", "zone")
 
 	def __init__(self, ts, entity, zone):
 		self.ts = ts
@@ -137,6 +224,7 @@ class HideEntity(Packet):
 
 class FullEntity(Packet):
 	power_type = PowerType.FULL_ENTITY
+	__slots__ = ("entity", "card_id", "tags")
 
 	def __init__(self, ts, entity, card_id):
 		self.ts = ts
@@ -147,6 +235,7 @@ class FullEntity(Packet):
 
 class ShowEntity(Packet):
 	power_type = PowerType.SHOW_ENTITY
+	__slots__ = ("entity", "card_id", "tags")
 
 	def __init__(self, ts, entity, card_id):
 		self.ts = ts
@@ -162,6 +251,7 @@ class ShowEntity(Packet):
 
 class ChangeEntity(Packet):
 	power_type = PowerType.CHANGE_ENTITY
+	__slots__ = ("entity", "card_id", "tags")
 
 	def __init__(self, ts, entity, card_id):
 		self.ts = ts
@@ -172,6 +262,7 @@ class ChangeEntity(Packet):
 
 class TagChange(Packet):
 	power_type = PowerType.TAG_CHANGE
+	__slots__ = ("entity", "tag", "value", "has_change_def")
 
 	def __init__(self, ts, entity, tag, value, has_change_def=False):
 		self.ts = ts
@@ -182,6 +273,8 @@ class TagChange(Packet):
 
 
 class Choices(Packet):
+	__slots__ = ("entity", "id", "tasklist", "type", "min", "max", "source", "choices")
+
 	def __init__(self, ts, entity, id, tasklist, type, min, max):
 		self.ts = ts
 		self.entity = entity
@@ -199,6 +292,8 @@ class Choices(Packet):
 
 
 class SendChoices(Packet):
+	__slots__ = ("entity", "id", "type", "choices")
+
 	def __init__(self, ts, id, type):
 		self.ts = ts
 		self.entity = None
@@ -208,6 +303,8 @@ class SendChoices(Packet):
 
 
 class ChosenEntities(Packet):
+	__slots__ = ("entity", "id", "choices")
+
 	def __init__(self, ts, entity, id):
 		self.ts = ts
 		self.entity = entity
@@ -216,6 +313,8 @@ class ChosenEntities(Packet):
 
 
 class Options(Packet):
+	__slots__ = ("entity", "id", "options")
+
 	def __init__(self, ts, id):
 		self.ts = ts
 		self.entity = None
@@ -224,6 +323,8 @@ class Options(Packet):
 
 
 class Option(Packet):
+	__slots__ = ("entity", "id", "type", "optype", "error", "error_param", "options")
+
 	def __init__(self, ts, entity, id, type, optype, error, error_param):
 		self.ts = ts
 		self.entity = entity
@@ -236,6 +337,8 @@ class Option(Packet):
 
 
 class SendOption(Packet):
+	__slots__ = ("entity", "option", "suboption", "target", "position")
+
 	def __init__(self, ts, option, suboption, target, position):
 		self.ts = ts
 		self.entity = None
@@ -246,12 +349,21 @@ class SendOption(Packet):
 
 
 class ResetGame(Packet):
+	__slots__ = ()
+
 	def __init__(self, ts):
 		self.ts = ts
 
 
 class SubSpell(Packet):
 	power_type = PowerType.SUB_SPELL_START
+	__slots__ = (
+		"spell_prefab_guid", "source", "target_count", "ended", "targets", "packets",
+		"_parent", "__weakref__",
+	)
+	parent = property(_get_parent, _set_parent)
+	__getstate__ = _get_slot_state
+	__setstate__ = _set_slot_state
 
 	def __init__(self, ts, spell_prefab_guid, source, target_count):
 		self.ts = ts
@@ -261,6 +373,7 @@ class SubSpell(Packet):
 		self.ended = False
 		self.targets = []
 		self.packets = []
+		self.parent = None
 
 	def __repr__(self):
 		return "%s(spell_prefab_guid=%r, source=%r)" % (
@@ -273,6 +386,7 @@ class SubSpell(Packet):
 
 class CachedTagForDormantChange(Packet):
 	power_type = PowerType.CACHED_TAG_FOR_DORMANT_CHANGE
+	__slots__ = ("entity", "tag", "value")
 
 	def __init__(self, ts, entity, tag, value):
 		self.ts = ts
@@ -283,6 +397,7 @@ class CachedTagForDormantChange(Packet):
 
 class VOSpell(Packet):
 	power_type = PowerType.VO_SPELL
+	__slots__ = ("brguid", "vospguid", "blocking", "delayms")
 
 	def __init__(self, ts, brguid, vospguid, blocking, delayms):
 		self.ts = ts
@@ -294,7 +409,107 @@ class VOSpell(Packet):
 
 class ShuffleDeck(Packet):
 	power_type = PowerType.SHUFFLE_DECK
+	__slots__ = ("player_id",)
 
 	def __init__(self, ts, player_id):
 		self.ts = ts
 		self.player_id = player_id
+
+
+class TagChangeStore:
+	"""
+	The TAG_CHANGE packets of a PacketTree, stored column by column.
+
+	The tree's packet lists (see PacketList) hold row indexes in place of those
+	packets and turn them back into TagChange packets when they are read. The
+	packets are rebuilt on every read, so changes made to them are not kept.
+	Enum tags and values come back as enum members even when the log had a number.
+	"""
+
+	def __init__(self):
+		self.entities = array("i")
+		self.tags = array("i")
+		self.values = array("q")
+		self.has_change_defs = array("b")
+		self.packet_ids = array("i")
+		# packet_id of the enclosing Block or SubSpell, 0 at the top of the tree
+		self.parent_ids = array("i")
+		self.timestamps = []
+		self._columns = (
+			self.entities, self.tags, self.values, self.has_change_defs,
+			self.packet_ids, self.parent_ids
+		)
+
+	def __len__(self):
+		return len(self.timestamps)
+
+	def __getitem__(self, row):
+		tag, value = restore_tag(self.tags[row], self.values[row])
+		packet = TagChange(
+			self.timestamps[row], self.entities[row], tag, value,
+			bool(self.has_change_defs[row])
+		)
+		packet.packet_id = self.packet_ids[row]
+		return packet
+
+	def append(self, ts, entity, tag, value, has_change_def, packet_id, parent_id):
+		"""
+		Store a TAG_CHANGE and return its row index. Returns None, storing nothing,
+		if the entity is not an entity id or a value does not fit in its column.
+		"""
+		if not isinstance(entity, int):
+			return None
+		row = len(self.timestamps)
+		try:
+			for column, item in zip(
+				self._columns, (entity, tag, value, has_change_def, packet_id, parent_id)
+			):
+				column.append(item)
+		except OverflowError:
+			for column in self._columns:
+				del column[row:]
+			return None
+		self.timestamps.append(ts)
+		return row
+
+	def find(self, entity=None, tag=None):
+		"""
+		Yield the TagChange packets of `entity` and/or `tag`, in log order,
+		scanning only the entity and tag columns.
+		"""
+		for row, (e, t) in enumerate(zip(self.entities, self.tags)):
+			if (entity is None or e == entity) and (tag is None or t == tag):
+				yield self[row]
+
+
+class PacketList(list):
+	"""
+	A list of packets in which TagChange packets may be stored as row indexes
+	into a TagChangeStore. Iterating and indexing always return packets.
+	"""
+
+	__slots__ = ("store", )
+
+	def __init__(self, store: TagChangeStore, packets=()):
+		super().__init__(packets)
+		self.store = store
+
+	def __reduce_ex__(self, protocol):
+		return self.__class__, (self.store, list(list.__iter__(self)))
+
+	def __iter__(self):
+		store = self.store
+		for item in list.__iter__(self):
+			yield store[item] if item.__class__ is int else item
+
+	def __reversed__(self):
+		store = self.store
+		for item in list.__reversed__(self):
+			yield store[item] if item.__class__ is int else item
+
+	def __getitem__(self, index):
+		item = list.__getitem__(self, index)
+		store = self.store
+		if isinstance(index, slice):
+			return [store[i] if i.__class__ is int else i for i in item]
+		return store[item] if item.__class__ is int else item
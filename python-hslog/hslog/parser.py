@@ -1,11 +1,11 @@
 import logging
+import pickle
 from datetime import datetime, timedelta
-from typing import Any, Callable, Dict, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-from aniso8601 import parse_time
 from hearthstone.enums import (
 	BlockType, ChoiceType, FormatType, GameTag, GameType,
-	MetaDataType, Mulligan, OptionType, PowerType
+	MetaDataType, Mulligan, OptionType, PowerType, State
 )
 
 from . import packets, tokens
@@ -15,12 +15,45 @@ from .packets import (
 	MetaData, Packet, PacketTree, SendChoices, SubSpell
 )
 from .player import PlayerManager, PlayerReference, coerce_to_entity_id
-from .utils import parse_enum, parse_tag
+from .utils import (
+	LazyTimestamp, parse_enum, parse_powerlog_time, parse_tag, powerlog_method_offset
+)
+
+
+class ParserObserver:
+	"""
+	Base class for objects notified while a LogParser parses, as soon as the line
+	that causes the event is read. See LogParser.add_observer().
+	"""
+
+	def on_game_created(self, packet_tree: PacketTree):
+		pass
+
+	def on_block_end(self, block: Block):
+		pass
+
+	def on_tag_change(self, packet_tree: PacketTree, entity_id, tag, value):
+		pass
+
+	def on_entity(self, packet_tree: PacketTree, packet: Packet):
+		"""
+		Called for FULL_ENTITY, SHOW_ENTITY, HIDE_ENTITY and CHANGE_ENTITY packets,
+		when their first line is read: initial tags that follow are not notified.
+		"""
+		pass
+
+	def on_game_ended(self, packet_tree: PacketTree):
+		"""Called when the game entity's STATE changes to COMPLETE."""
+		pass
 
 
 class ParsingState:
 
-	def __init__(self):
+	def __init__(self, columnar_tag_changes: bool = False):
+		self.columnar_tag_changes = columnar_tag_changes
+		self.max_games: Optional[int] = None
+		self.on_game_completed: Optional[Callable[[PacketTree], None]] = None
+		self.observers: List[ParserObserver] = []
 		self.current_block: Optional[Union[Packet, PacketTree]] = None
 		self.game_meta = {}
 		self.games = []
@@ -48,6 +81,9 @@ class ParsingState:
 
 		block = self.current_block
 		self.current_block = self.current_block.parent
+		if self.observers and isinstance(block, Block):
+			for observer in self.observers:
+				observer.on_block_end(block)
 		return block
 
 	def _register_player_name_mulligan(self, player: PlayerReference, packet: Choices):
@@ -79,6 +115,39 @@ class ParsingState:
 
 		return player
 
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		# Callbacks are not picklable, LogParser.restore() sets them again
+		state["on_game_completed"] = None
+		state["observers"] = []
+		return state
+
+	def add_game(self, packet_tree: PacketTree):
+		# A new game means the previous one is complete
+		if self.games and self.on_game_completed is not None:
+			self.on_game_completed(self.games[-1])
+		self.games.append(packet_tree)
+		if self.max_games is not None and len(self.games) > self.max_games:
+			del self.games[:-self.max_games]
+		for observer in self.observers:
+			observer.on_game_created(packet_tree)
+
+	def notify_entity(self, packet: Packet):
+		packet_tree = self.packet_tree
+		for observer in self.observers:
+			observer.on_entity(packet_tree, packet)
+
+	def notify_tag_change(self, entity_id, tag, value):
+		packet_tree = self.packet_tree
+		for observer in self.observers:
+			observer.on_tag_change(packet_tree, entity_id, tag, value)
+		if (
+			tag == GameTag.STATE and value == State.COMPLETE and
+			self.game_packet is not None and entity_id == self.game_packet.entity
+		):
+			for observer in self.observers:
+				observer.on_game_ended(packet_tree)
+
 	def flush(self):
 		if self.metadata_node:
 			self.metadata_node = None
@@ -122,7 +191,7 @@ class ParsingState:
 
 	def register_game(self, _ts: int, entity_id: int):
 		# Use the timestamp from CREATE_GAME because it's earlier
-		ts = self.packet_tree.ts
+		ts = self.packet_tree._ts
 		self.game_packet = self.entity_packet = packets.CreateGame(ts, entity_id)
 		self.register_packet(self.game_packet)
 		return self.game_packet
@@ -134,6 +203,33 @@ class ParsingState:
 		self.packet_tree.packet_counter += 1
 		packet.packet_id = self.packet_tree.packet_counter
 
+	def register_block(self, block: Union[Block, SubSpell]):
+		block.parent = self.current_block
+		if self.packet_tree.tag_changes is not None:
+			block.packets = packets.PacketList(self.packet_tree.tag_changes)
+		self.register_packet(block)
+		self.current_block = block
+
+	def register_tag_change(self, ts, entity_id, tag, value, has_change_def: bool):
+		"""
+		Register a TAG_CHANGE packet. When the packet tree keeps its tag changes in
+		columns, the row is stored directly, no packet is created and None is
+		returned.
+		"""
+		store = self.packet_tree.tag_changes
+		if store is not None:
+			packet_id = self.packet_tree.packet_counter + 1
+			parent_id = getattr(self.current_block, "packet_id", 0)
+			row = store.append(ts, entity_id, tag, value, has_change_def, packet_id, parent_id)
+			if row is not None:
+				self.current_block.packets.append(row)
+				self.packet_tree.packet_counter = packet_id
+				return None
+
+		packet = packets.TagChange(ts, entity_id, tag, value, has_change_def)
+		self.register_packet(packet)
+		return packet
+
 	def register_player(self, ts, entity_id: int, player_id: int, hi: int, lo: int):
 		hi = int(hi)
 		lo = int(lo)
@@ -187,6 +283,9 @@ def clean_option_errors(error, error_param):
 
 
 class HandlerBase:
+	# Methods (without the game state processor prefix) find_callback() handles
+	methods: Tuple[str, ...] = ()
+
 	def __init__(self):
 		self._game_state_processor = "GameState"
 
@@ -198,11 +297,44 @@ class HandlerBase:
 
 
 class PowerHandler(HandlerBase):
-	def __init__(self):
+	methods = ("DebugPrintPower", "DebugPrintGame")
+
+	def __init__(self, skip_cosmetic: bool = False):
 		super().__init__()
 
 		self._creating_game = False
 
+		# Opcode -> (regex, callback), most frequent opcodes first. Opcodes with a
+		# None regex pick their regex themselves and get called with the raw data.
+		self._power_dispatch = {
+			"TAG_CHANGE": (tokens.TAG_CHANGE_RE, self.tag_change),
+			"SHOW_ENTITY": (tokens.SHOW_ENTITY_RE, self.show_entity),
+			"FULL_ENTITY": (None, self._handle_full_entity),
+			"BLOCK_START": (None, self._handle_block_start),
+			"BLOCK_END": (tokens.BLOCK_END_RE, self.block_end),
+			"HIDE_ENTITY": (tokens.HIDE_ENTITY_RE, self.hide_entity),
+			"META_DATA": (tokens.META_DATA_RE, self.meta_data),
+			"SUB_SPELL_START": (tokens.SUB_SPELL_START_RE, self.sub_spell_start),
+			"SUB_SPELL_END": (tokens.SUB_SPELL_END_RE, self.sub_spell_end),
+			"CHANGE_ENTITY": (tokens.CHANGE_ENTITY_RE, self.change_entity),
+			"CACHED_TAG_FOR_DORMANT_CHANGE": (
+				tokens.CACHED_TAG_FOR_DORMANT_CHANGE_RE,
+				self.cached_tag_for_dormant_change
+			),
+			"VO_SPELL": (tokens.VO_SPELL_RE, self.vo_spell),
+			"SHUFFLE_DECK": (tokens.SHUFFLE_DECK_RE, self.shuffle_deck),
+			"CREATE_GAME": (tokens.CREATE_GAME_RE, self.create_game),
+			"RESET_GAME": (tokens.RESET_GAME_RE, self.reset_game),
+			"ACTION_START": (None, self._handle_block_start),
+			"ACTION_END": (tokens.BLOCK_END_RE, self.block_end),
+		}
+
+		# Metadata, sub-spells and voice-over spells carry no entity state
+		self._skip_cosmetic = skip_cosmetic
+		if skip_cosmetic:
+			for opcode in ("META_DATA", "SUB_SPELL_START", "SUB_SPELL_END", "VO_SPELL"):
+				self._power_dispatch[opcode] = (None, self._skip_power)
+
 	@staticmethod
 	def _check_for_mulligan_hack(ps: ParsingState, ts, tag, value):
 
@@ -247,7 +379,27 @@ class PowerHandler(HandlerBase):
 			ps.game_meta[key] = value
 
 	def handle_data(self, ps: ParsingState, ts, data):
-		opcode = data.split()[0]
+		# Only the first word is needed, so avoid splitting the whole line
+		opcode = data.split(None, 1)[0]
+
+		# Initial tags are the most common lines, handle them first
+		if opcode.startswith("tag="):
+			# parse_tag's results are cached, so the (tag, value) pair is stored as is
+			# and shared between every entity that has the same tag
+			tag_value = parse_initial_tag(data)
+			tag, value = tag_value
+
+			assert hasattr(ps.entity_packet, "tags")
+			ps.entity_packet.tags.append(tag_value)  # noqa
+
+			if tag == GameTag.CONTROLLER:
+
+				# We need to know entity controllers for player name registration
+
+				assert hasattr(ps.entity_packet, "entity")
+				entity_id = coerce_to_entity_id(ps.entity_packet.entity)  # noqa
+				ps.manager.register_controller(int(entity_id), int(value))
+			return
 
 		if opcode == "ERROR:":
 			# Line error... skip
@@ -256,6 +408,10 @@ class PowerHandler(HandlerBase):
 		if opcode in PowerType.__members__:
 			return self.handle_power(ps, ts, opcode, data)
 
+		if self._skip_cosmetic and opcode.startswith(("Info[", "Source", "Targets[")):
+			# Lines belonging to skipped META_DATA and SUB_SPELL_START packets
+			return
+
 		if opcode == "GameEntity":
 			ps.flush()
 			self._creating_game = True
@@ -280,20 +436,6 @@ class PowerHandler(HandlerBase):
 				int(hi_str),
 				int(lo_str)
 			)
-		elif opcode.startswith("tag="):
-			tag, value = parse_initial_tag(data)
-
-			assert hasattr(ps.entity_packet, "tags")
-			ps.entity_packet.tags.append((tag, value))  # noqa
-
-			if tag == GameTag.CONTROLLER:
-
-				# We need to know entity controllers for player name registration
-
-				assert hasattr(ps.entity_packet, "entity")
-				entity_id = coerce_to_entity_id(ps.entity_packet.entity)  # noqa
-				ps.manager.register_controller(int(entity_id), int(value))
-
 		elif opcode.startswith("Info["):
 			if not ps.metadata_node:
 				logging.warning("[%s] Metadata Info outside of META_DATA: %r", ts, data)
@@ -332,91 +474,78 @@ class PowerHandler(HandlerBase):
 	def handle_power(self, ps: ParsingState, ts, opcode, data):
 		ps.flush()
 
-		if opcode == "CREATE_GAME":
-			regex, callback = tokens.CREATE_GAME_RE, self.create_game
-		elif opcode in ("ACTION_START", "BLOCK_START"):
-			index = None
-			effectid, effectindex = None, None
-			suboption, trigger_keyword = None, None
-			if " SubOption=" in data:
-				if " TriggerKeyword=" in data:
-					sre = tokens.BLOCK_START_20457_TRIGGER_KEYWORD_RE.match(data)
-					if sre is None:
-						raise RegexParsingError(data)
-					(
-						block_type,
-						entity,
-						effectid,
-						effectindex,
-						target,
-						suboption,
-						trigger_keyword
-					) = sre.groups()
-				else:
-					sre = tokens.BLOCK_START_20457_RE.match(data)
-					if sre is None:
-						raise RegexParsingError(data)
-					(
-						block_type,
-						entity,
-						effectid,
-						effectindex,
-						target,
-						suboption
-					) = sre.groups()
-			else:
-				if opcode == "ACTION_START":
-					sre = tokens.ACTION_START_RE.match(data)
-				else:
-					sre = tokens.BLOCK_START_12051_RE.match(data)
+		entry = self._power_dispatch.get(opcode)
+		if entry is None:
+			raise NotImplementedError(data)
+		regex, callback = entry
 
-				if sre is None:
-					sre = tokens.ACTION_START_OLD_RE.match(data)
-					if not sre:
-						raise RegexParsingError(data)
-					entity, block_type, index, target = sre.groups()
-				else:
-					block_type, entity, effectid, effectindex, target = sre.groups()
+		if regex is None:
+			return callback(ps, ts, opcode, data)
 
-			self.block_start(
-				ps, ts, entity, block_type, index, effectid, effectindex, target, suboption,
-				trigger_keyword
-			)
+		sre = regex.match(data)
+		if not sre:
+			logging.warning("[%s] Could not correctly parse %r", ts, data)
 			return
-		elif opcode in ("ACTION_END", "BLOCK_END"):
-			regex, callback = tokens.BLOCK_END_RE, self.block_end
-		elif opcode == "FULL_ENTITY":
-			if data.startswith("FULL_ENTITY - Updating"):
-				regex, callback = tokens.FULL_ENTITY_UPDATE_RE, self.full_entity_update
+		return callback(ps, ts, *sre.groups())
+
+	@staticmethod
+	def _skip_power(ps: ParsingState, ts, opcode, data):
+		pass
+
+	def _handle_block_start(self, ps: ParsingState, ts, opcode, data):
+		index = None
+		effectid, effectindex = None, None
+		suboption, trigger_keyword = None, None
+		if " SubOption=" in data:
+			if " TriggerKeyword=" in data:
+				sre = tokens.BLOCK_START_20457_TRIGGER_KEYWORD_RE.match(data)
+				if sre is None:
+					raise RegexParsingError(data)
+				(
+					block_type,
+					entity,
+					effectid,
+					effectindex,
+					target,
+					suboption,
+					trigger_keyword
+				) = sre.groups()
 			else:
-				regex, callback = tokens.FULL_ENTITY_CREATE_RE, self.full_entity
-		elif opcode == "SHOW_ENTITY":
-			regex, callback = tokens.SHOW_ENTITY_RE, self.show_entity
-		elif opcode == "HIDE_ENTITY":
-			regex, callback = tokens.HIDE_ENTITY_RE, self.hide_entity
-		elif opcode == "CHANGE_ENTITY":
-			regex, callback = tokens.CHANGE_ENTITY_RE, self.change_entity
-		elif opcode == "TAG_CHANGE":
-			regex, callback = tokens.TAG_CHANGE_RE, self.tag_change
-		elif opcode == "META_DATA":
-			regex, callback = tokens.META_DATA_RE, self.meta_data
-		elif opcode == "RESET_GAME":
-			regex, callback = tokens.RESET_GAME_RE, self.reset_game
-		elif opcode == "SUB_SPELL_START":
-			regex, callback = tokens.SUB_SPELL_START_RE, self.sub_spell_start
-		elif opcode == "SUB_SPELL_END":
-			regex, callback = tokens.SUB_SPELL_END_RE, self.sub_spell_end
-		elif opcode == "CACHED_TAG_FOR_DORMANT_CHANGE":
-			regex, callback = (
-				tokens.CACHED_TAG_FOR_DORMANT_CHANGE_RE,
-				self.cached_tag_for_dormant_change
-			)
-		elif opcode == "VO_SPELL":
-			regex, callback = tokens.VO_SPELL_RE, self.vo_spell
-		elif opcode == "SHUFFLE_DECK":
-			regex, callback = tokens.SHUFFLE_DECK_RE, self.shuffle_deck
+				sre = tokens.BLOCK_START_20457_RE.match(data)
+				if sre is None:
+					raise RegexParsingError(data)
+				(
+					block_type,
+					entity,
+					effectid,
+					effectindex,
+					target,
+					suboption
+				) = sre.groups()
 		else:
-			raise NotImplementedError(data)
+			if opcode == "ACTION_START":
+				sre = tokens.ACTION_START_RE.match(data)
+			else:
+				sre = tokens.BLOCK_START_12051_RE.match(data)
+
+			if sre is None:
+				sre = tokens.ACTION_START_OLD_RE.match(data)
+				if not sre:
+					raise RegexParsingError(data)
+				entity, block_type, index, target = sre.groups()
+			else:
+				block_type, entity, effectid, effectindex, target = sre.groups()
+
+		self.block_start(
+			ps, ts, entity, block_type, index, effectid, effectindex, target, suboption,
+			trigger_keyword
+		)
+
+	def _handle_full_entity(self, ps: ParsingState, ts, opcode, data):
+		if data.startswith("FULL_ENTITY - Updating"):
+			regex, callback = tokens.FULL_ENTITY_UPDATE_RE, self.full_entity_update
+		else:
+			regex, callback = tokens.FULL_ENTITY_CREATE_RE, self.full_entity
 
 		sre = regex.match(data)
 		if not sre:
@@ -428,10 +557,10 @@ class PowerHandler(HandlerBase):
 
 	@staticmethod
 	def create_game(ps: ParsingState, ts):
-		pt = packets.PacketTree(ts)
+		pt = packets.PacketTree(ts, columnar_tag_changes=ps.columnar_tag_changes)
 		pt.spectator_mode = ps.spectator_mode
 
-		ps.games.append(pt)
+		ps.add_game(pt)
 		ps.current_block = pt
 		ps.packet_tree = pt
 
@@ -461,14 +590,14 @@ class PowerHandler(HandlerBase):
 			ts, entity_id, block_type, index, effectid, effectindex, target, suboption,
 			trigger_keyword
 		)
-		block.parent = ps.current_block
-		ps.register_packet(block)
-		ps.current_block = block
+		ps.register_block(block)
 		return block
 
 	def _full_entity(self, ps: ParsingState, ts, entity_id: int, card_id: str):
 		ps.entity_packet = packets.FullEntity(ts, entity_id, card_id)
 		ps.register_packet(ps.entity_packet)
+		if ps.observers:
+			ps.notify_entity(ps.entity_packet)
 
 		if self._creating_game:
 			# First packet after create game should always be a FULL_ENTITY
@@ -493,6 +622,8 @@ class PowerHandler(HandlerBase):
 		entity_id = ps.parse_entity_id(entity)
 		ps.entity_packet = packets.ShowEntity(ts, entity_id, card_id)
 		ps.register_packet(ps.entity_packet)
+		if ps.observers:
+			ps.notify_entity(ps.entity_packet)
 		return ps.entity_packet
 
 	@staticmethod
@@ -505,6 +636,8 @@ class PowerHandler(HandlerBase):
 
 		packet = packets.HideEntity(ts, entity_id, value)
 		ps.register_packet(packet)
+		if ps.observers:
+			ps.notify_entity(packet)
 		return packet
 
 	@staticmethod
@@ -512,6 +645,8 @@ class PowerHandler(HandlerBase):
 		entity_id = ps.parse_entity_or_player(entity)
 		ps.entity_packet = packets.ChangeEntity(ts, entity_id, card_id)
 		ps.register_packet(ps.entity_packet)
+		if ps.observers:
+			ps.notify_entity(ps.entity_packet)
 		return ps.entity_packet
 
 	@staticmethod
@@ -579,8 +714,9 @@ class PowerHandler(HandlerBase):
 			entity_id = entity
 
 		has_change_def = def_change == tokens.DEF_CHANGE
-		packet = packets.TagChange(ts, entity_id, tag, value, has_change_def)
-		ps.register_packet(packet)
+		packet = ps.register_tag_change(ts, entity_id, tag, value, has_change_def)
+		if ps.observers:
+			ps.notify_tag_change(entity_id, tag, value)
 		return packet
 
 	@staticmethod
@@ -595,9 +731,7 @@ class PowerHandler(HandlerBase):
 		target_count = int(target_count)
 
 		sub_spell = packets.SubSpell(ts, spell_prefab_guid, source, target_count)
-		sub_spell.parent = ps.current_block
-		ps.register_packet(sub_spell)
-		ps.current_block = sub_spell
+		ps.register_block(sub_spell)
 		return sub_spell
 
 	@staticmethod
@@ -636,6 +770,8 @@ class PowerHandler(HandlerBase):
 
 
 class OptionsHandler(HandlerBase):
+	methods = ("SendOption", "DebugPrintOptions")
+
 	def __init__(self):
 		super().__init__()
 
@@ -764,6 +900,10 @@ class OptionsHandler(HandlerBase):
 
 
 class ChoicesHandler(HandlerBase):
+	methods = (
+		"DebugPrintEntityChoices", "DebugPrintChoices", "SendChoices", "DebugPrintEntitiesChosen"
+	)
+
 	def __init__(self):
 		super().__init__()
 
@@ -1008,20 +1148,106 @@ class SpectatorModeHandler:
 			raise NotImplementedError("Unhandled spectator mode: %r" % line)
 
 
+# Parse profiles accepted by LogParser, see LogParser.__init__
+PARSE_PROFILES = ("full", "entities")
+
+
+class ParserCheckpoint:
+	"""
+	A snapshot of a LogParser's state, taken after `offset` bytes of the log were read.
+
+	Checkpoints are created by LogParser.checkpoint() and applied with
+	LogParser.restore(). They can be persisted with dump() / load() so that parsing
+	can resume where it left off, for example after a restart in the middle of a game.
+	"""
+
+	# Bumped whenever the pickled parser state changes shape
+	VERSION = 5
+
+	def __init__(self, offset: int, data: bytes):
+		self.offset = offset
+		self.data = data
+
+	def __repr__(self):
+		return "%s(offset=%r, size=%r)" % (self.__class__.__name__, self.offset, len(self.data))
+
+	def dump(self, fp):
+		pickle.dump((self.offset, self.data), fp, protocol=pickle.HIGHEST_PROTOCOL)
+
+	@classmethod
+	def load(cls, fp) -> "ParserCheckpoint":
+		offset, data = pickle.load(fp)
+		return cls(offset, data)
+
+
 class LogParser:
-	def __init__(self):
+	def __init__(
+		self,
+		lazy_timestamps: bool = False,
+		columnar_tag_changes: bool = False,
+		max_games: Optional[int] = None,
+		on_game_completed: Optional[Callable[[PacketTree], None]] = None,
+		profile: str = "full",
+	):
+		"""
+		With `lazy_timestamps`, packet timestamps are only parsed when their `ts`
+		attribute is first read, which saves the work for consumers that never
+		look at them.
+		With `columnar_tag_changes`, each game keeps its TAG_CHANGE packets in a
+		TagChangeStore (PacketTree.tag_changes) instead of as separate objects.
+		`max_games` limits `games` to the most recent games, so that memory does not
+		grow with the length of the log. A game is complete once the next one starts;
+		`on_game_completed` is then called with its PacketTree, before it is dropped.
+		The "entities" `profile` only parses what the entity tree and player
+		resolution need: options, sent choices, metadata, sub-spells and voice-over
+		spells are skipped. The default "full" profile parses everything.
+		"""
+		if profile not in PARSE_PROFILES:
+			raise ValueError("Unknown parse profile: %r" % (profile))
+		if max_games is not None and max_games < 1:
+			raise ValueError("max_games must be at least 1, got %r" % (max_games))
+		self._max_games = max_games
+		self._on_game_completed = on_game_completed
+		self._observers: List[ParserObserver] = []
 		self.line_regex = tokens.POWERLOG_LINE_RE
 		self._current_date = None
 		self._synced_timestamp = False
 		self._last_ts = None
+		self._lazy_timestamps = lazy_timestamps
 
-		self._parsing_state = ParsingState()
+		self._parsing_state = ParsingState(columnar_tag_changes)
+		self._parsing_state.max_games = max_games
+		self._parsing_state.on_game_completed = on_game_completed
+		self._parsing_state.observers = self._observers
 
-		self._power_handler = PowerHandler()
+		self._power_handler = PowerHandler(skip_cosmetic=profile == "entities")
 		self._choices_handler = ChoicesHandler()
 		self._options_handler = OptionsHandler()
 		self._spectator_mode_handler = SpectatorModeHandler()
 
+		# Lines that do not start with one of these, right after the timestamp, are
+		# dropped before any regex runs (see read_line)
+		skipped_methods = ()
+		if profile == "entities":
+			skipped_methods = (
+				self._options_handler.parse_method("DebugPrintOptions"),
+				self._options_handler.parse_method("SendOption"),
+				self._choices_handler.parse_method("SendChoices"),
+			)
+		self._line_prefixes = tuple(
+			"%s()" % (handler.parse_method(method))
+			for handler in (self._power_handler, self._choices_handler, self._options_handler)
+			for method in handler.methods
+			if handler.parse_method(method) not in skipped_methods
+		) + (tokens.SPECTATOR_MODE_TOKEN, )
+
+	def add_observer(self, observer: ParserObserver):
+		"""Notify `observer` of the events of every line parsed from now on."""
+		self._observers.append(observer)
+
+	def remove_observer(self, observer: ParserObserver):
+		self._observers.remove(observer)
+
 	def flush(self):
 		self._parsing_state.flush()
 
@@ -1049,7 +1275,10 @@ class LogParser:
 		if self._last_ts is not None and self._last_ts[0] == ts:
 			return self._last_ts[1]
 
-		ret = parse_time(ts)
+		if self._lazy_timestamps:
+			return self._parse_lazy_timestamp(ts)
+
+		ret = parse_powerlog_time(ts)
 
 		if not self._synced_timestamp:
 
@@ -1091,15 +1320,89 @@ class LogParser:
 		self._last_ts = (ts, ret)
 		return ret
 
+	def _parse_lazy_timestamp(self, ts):
+		# Same rules as the eager path, but the day rollover is detected on the raw
+		# strings, which sort like the times they hold when the layout is the same.
+		if self._current_date is None:
+			ret = LazyTimestamp(ts)
+		else:
+			if self._last_ts is not None:
+				last = self._last_ts[0]
+				if len(ts) == len(last):
+					rolled_over = ts < last
+				else:
+					rolled_over = parse_powerlog_time(ts) < parse_powerlog_time(last)
+				if rolled_over:
+					self._current_date += timedelta(days=1)
+			ret = LazyTimestamp(ts, self._current_date.date(), self._current_date.tzinfo)
+
+		self._synced_timestamp = True
+		self._last_ts = (ts, ret)
+		return ret
+
 	@property
 	def player_manager(self):
 		return self._parsing_state.manager
 
+	def checkpoint(self, offset: int = 0) -> ParserCheckpoint:
+		"""
+		Snapshot the parser after `offset` bytes of the log have been fed to it.
+		The snapshot is independent of any parsing that happens afterwards.
+		"""
+		options = self._options_handler
+		state = {
+			"version": ParserCheckpoint.VERSION,
+			"parsing_state": self._parsing_state,
+			"creating_game": self._power_handler._creating_game,
+			"options": (options._options_packet, options._option_packet, options._suboption_packet),
+			"current_date": self._current_date,
+			"synced_timestamp": self._synced_timestamp,
+			"last_ts": self._last_ts,
+		}
+		return ParserCheckpoint(offset, pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+	def restore(self, checkpoint: ParserCheckpoint) -> int:
+		"""
+		Restore the state saved in `checkpoint`, discarding the current one.
+		Returns the byte offset at which reading should resume.
+		"""
+		state = pickle.loads(checkpoint.data)
+		if state.get("version") != ParserCheckpoint.VERSION:
+			raise ValueError("Unsupported checkpoint version: %r" % (state.get("version")))
+		options = self._options_handler
+		self._parsing_state = state["parsing_state"]
+		self._parsing_state.max_games = self._max_games
+		self._parsing_state.on_game_completed = self._on_game_completed
+		self._parsing_state.observers = self._observers
+		self._power_handler._creating_game = state["creating_game"]
+		(
+			options._options_packet,
+			options._option_packet,
+			options._suboption_packet
+		) = state["options"]
+		self._current_date = state["current_date"]
+		self._synced_timestamp = state["synced_timestamp"]
+		self._last_ts = state["last_ts"]
+		return checkpoint.offset
+
 	def read(self, fp):
 		for line in fp:
 			self.read_line(line)
 
 	def read_line(self, line):
+		# Most lines are for methods no handler parses (PowerTaskList, ...) or come
+		# before the first CREATE_GAME. Look at the method name where it starts and drop
+		# those lines without running any regex.
+		start = powerlog_method_offset(line)
+		if start != -1:
+			if not line.startswith(self._line_prefixes, start):
+				return
+			if (
+				not self._parsing_state.current_block and "CREATE_GAME" not in line and
+				not line.startswith(tokens.SPECTATOR_MODE_TOKEN, start)
+			):
+				return
+
 		sre = tokens.TIMESTAMP_RE.match(line)
 
 		if not sre:
@@ -1122,12 +1425,6 @@ class LogParser:
 		method, msg = sre.groups()
 		msg = msg.strip()
 
-		if not self._parsing_state.current_block and "CREATE_GAME" not in msg:
-
-			# Ignore messages before the first CREATE_GAME packet
-
-			return
-
 		for handler in self._power_handler, self._choices_handler, self._options_handler:
 			callback = handler.find_callback(method)
 			if callback:
@@ -0,0 +1,567 @@
+"""
+Generate synthetic, valid Power.log streams.
+
+This is meant for load testing log consumers offline: the output parses with
+LogParser and exports with EntityTreeExporter, but it is not a faithful replay of
+real games. The mix of constructed and Battlegrounds games, spectated games and
+GAME_RESET blocks is configurable, and the same seed always yields the same log.
+
+Usage: python -m hslog.synthetic [--games N] [--turns N] [--rate LINES_PER_SEC] OUTPUT
+
+With --rate, lines are appended to OUTPUT in real time (with current timestamps),
+like Hearthstone does. To load test a client watching a Hearthstone install, point
+OUTPUT at <install>/Logs/Hearthstone_YYYY_MM_DD_HH_MM_SS/Power.log.
+"""
+import sys
+import time
+from argparse import ArgumentParser
+from datetime import datetime
+from random import Random
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from . import tokens
+
+
+GAME_ENTITY_ID = 1
+FIRST_PLAYER_ENTITY_ID = 2
+MAX_BOARD_SIZE = 7
+MAX_HAND_SIZE = 10
+
+TRIGGER_SUFFIX = "EffectCardId= EffectIndex=-1 Target=0 SubOption=-1 TriggerKeyword=0"
+BLOCK_SUFFIX = "EffectCardId= EffectIndex=0 Target=%s SubOption=-1"
+
+# (card id, name, cost, atk, health)
+CONSTRUCTED_CARDS = (
+	("CS2_182", "Chillwind Yeti", 4, 4, 5),
+	("EX1_048", "Spellbreaker", 4, 4, 3),
+	("CFM_654", "Friendly Bartender", 2, 3, 3),
+	("AT_094", "Flame Juggler", 2, 2, 3),
+	("ICC_705", "Bonemare", 7, 5, 5),
+	("EX1_319", "Flame Imp", 1, 3, 2),
+	("KAR_089", "Malchezaar's Imp", 1, 1, 3),
+	("CFM_685", "Don Han'Cho", 7, 5, 6),
+)
+CONSTRUCTED_HEROES = (
+	("HERO_09", "Anduin Wrynn", "CS1h_001", "Lesser Heal"),
+	("HERO_09a", "Tyrande Whisperwind", "CS1h_001_H1", "Lesser Heal"),
+)
+# (card id, name, tech level, atk, health)
+BATTLEGROUNDS_CARDS = (
+	("ICC_858", "Bolvar, Fireblood", 4, 1, 7),
+	("LOOT_078", "Cave Hydra", 4, 2, 4),
+	("GIL_681", "Nightmare Amalgam", 2, 3, 4),
+	("KAR_005", "Kindly Grandmother", 2, 1, 1),
+	("BG21_017", "Salty Looter", 3, 4, 4),
+	("OG_221", "Selfless Hero", 1, 2, 1),
+)
+BATTLEGROUNDS_HEROES = (
+	("TB_BaconShop_HERO_01", "Edwin VanCleef", "TB_BaconShop_HP_001", "Sharpen Blades"),
+	("TB_BaconShopBob", "Bob", "TB_BaconShop_HP_Bob", "Bob's Burgles"),
+)
+PLAYER_NAMES = ("Alice#1234", "Bob#5678", "Carol#4242", "Dave#1111")
+
+
+class _Entity:
+	__slots__ = ("id", "card_id", "name", "controller", "zone", "zone_pos", "revealed")
+
+	def __init__(self, id, card_id, name, controller, zone):
+		self.id = id
+		self.card_id = card_id
+		self.name = name
+		self.controller = controller
+		self.zone = zone
+		self.zone_pos = 0
+		self.revealed = False
+
+	def __str__(self):
+		if not self.revealed:
+			return (
+				"[entityName=UNKNOWN ENTITY [cardType=INVALID] id=%i zone=%s zonePos=%i "
+				"cardId= player=%i]" % (self.id, self.zone, self.zone_pos, self.controller)
+			)
+		return "[entityName=%s id=%i zone=%s zonePos=%i cardId=%s player=%i]" % (
+			self.name, self.id, self.zone, self.zone_pos, self.card_id, self.controller
+		)
+
+
+class PowerLogGenerator:
+	"""
+	An iterable of newline-terminated Power.log lines.
+
+	- games: Number of games to generate
+	- turns: Turns per constructed game, or shop/combat rounds per Battlegrounds game
+	- deck_size: Cards in each constructed deck
+	- shop_size: Minions offered by each Battlegrounds shop
+	- battlegrounds: Share (0-1) of games that are Battlegrounds games
+	- spectator: Share (0-1) of games that are spectated
+	- game_reset: Share (0-1) of games with a GAME_RESET block halfway through
+	- power_task_list: Repeat every top-level block in PowerTaskList, like the game
+	- now: Returns the time of each line; defaults to a deterministic clock
+	"""
+
+	def __init__(
+		self,
+		games: int = 1,
+		turns: int = 10,
+		deck_size: int = 30,
+		shop_size: int = 5,
+		battlegrounds: float = 0.0,
+		spectator: float = 0.0,
+		game_reset: float = 0.0,
+		power_task_list: bool = True,
+		seed: int = 0,
+		now: Optional[Callable[[], datetime]] = None,
+	):
+		self.games = games
+		self.turns = turns
+		self.deck_size = deck_size
+		self.shop_size = shop_size
+		self.battlegrounds = battlegrounds
+		self.spectator = spectator
+		self.game_reset = game_reset
+		self.power_task_list = power_task_list
+		self.random = Random(seed)
+		# The parser keeps track of players across games by name, so the same two
+		# accounts play every game, like they would in a real log.
+		self._player_names = self.random.sample(PLAYER_NAMES, 2)
+		self.now = now
+		# Deterministic clock in microseconds, starting at 20:00:00
+		self._clock = 20 * 3600 * 10 ** 6
+
+		self._entities: Dict[int, _Entity] = {}
+		self._next_id = 0
+		self._options_id = 0
+		self._depth = 0
+		self._task_list: List[str] = []
+		self._names = ("", "")
+		self._spectated = False
+		self._heroes_ids: Set[str] = set()
+		self._powers_ids: Set[str] = set()
+
+	def __iter__(self) -> Iterator[str]:
+		for game in range(self.games):
+			battlegrounds = self.random.random() < self.battlegrounds
+			spectated = self.random.random() < self.spectator
+			game_reset = self.random.random() < self.game_reset
+			yield from self._game(battlegrounds, spectated, game_reset)
+
+	def _timestamp(self) -> str:
+		if self.now is not None:
+			return self.now().strftime("%H:%M:%S.%f") + "0"
+		self._clock = (self._clock + self.random.randint(1, 2000)) % (24 * 3600 * 10 ** 6)
+		seconds, fraction = divmod(self._clock, 10 ** 6)
+		minutes, seconds = divmod(seconds, 60)
+		hours, minutes = divmod(minutes, 60)
+		return "%02d:%02d:%02d.%06d0" % (hours, minutes, seconds, fraction)
+
+	def _line(self, method: str, data: str) -> str:
+		return "D %s %s - %s\n" % (self._timestamp(), method, data)
+
+	def _power(self, data: str, indent: int = 0) -> Iterator[str]:
+		data = "    " * (self._depth + indent) + data
+		yield self._line("GameState.DebugPrintPower()", data)
+		if self.power_task_list:
+			self._task_list.append(data)
+
+	def _block_start(self, block_type: str, entity, suffix: str) -> Iterator[str]:
+		yield from self._power("BLOCK_START BlockType=%s Entity=%s %s" % (
+			block_type, entity, suffix
+		))
+		self._depth += 1
+
+	def _block_end(self) -> Iterator[str]:
+		self._depth -= 1
+		yield from self._power("BLOCK_END")
+		if self._depth == 0 and self._task_list:
+			# The game logs every top-level block a second time once it is shown
+			for data in self._task_list:
+				yield self._line("PowerTaskList.DebugPrintPower()", data)
+			self._task_list = []
+
+	def _spectator(self, message: str) -> str:
+		return "D %s %s %s %s\n" % (
+			self._timestamp(), tokens.SPECTATOR_MODE_TOKEN, message,
+			tokens.SPECTATOR_MODE_TOKEN
+		)
+
+	def _tag_change(self, entity, tag: str, value) -> Iterator[str]:
+		yield from self._power("TAG_CHANGE Entity=%s tag=%s value=%s" % (entity, tag, value))
+
+	def _create(
+		self, card, controller: int, zone: str, tags=(), revealed=True
+	) -> Iterator[str]:
+		self._next_id += 1
+		entity = _Entity(self._next_id, card[0], card[1], controller, zone)
+		entity.revealed = revealed
+		self._entities[entity.id] = entity
+		yield from self._power("FULL_ENTITY - Creating ID=%i CardID=%s" % (
+			entity.id, card[0] if revealed else ""
+		))
+		all_tags = (("ZONE", zone), ("CONTROLLER", controller), ("ENTITY_ID", entity.id))
+		for tag, value in all_tags + tuple(tags):
+			yield from self._power("tag=%s value=%s" % (tag, value), indent=1)
+
+	def _card_tags(self, card, battlegrounds: bool):
+		if battlegrounds:
+			return (
+				("CARDTYPE", "MINION"), ("TECH_LEVEL", card[2]), ("ATK", card[3]),
+				("HEALTH", card[4]), ("IS_BACON_POOL_MINION", 1),
+			)
+		return (
+			("CARDTYPE", "MINION"), ("COST", card[2]), ("ATK", card[3]), ("HEALTH", card[4])
+		)
+
+	def _in_zone(self, controller: int, zone: str) -> List[_Entity]:
+		return [
+			e for e in self._entities.values()
+			if e.controller == controller and e.zone == zone
+		]
+
+	def _minions(self, controller: int) -> List[_Entity]:
+		return [
+			e for e in self._in_zone(controller, "PLAY")
+			if e.card_id not in self._heroes_ids and e.card_id not in self._powers_ids
+		]
+
+	def _draw(self, player_id: int, count: int = 1) -> Iterator[str]:
+		yield from self._block_start("TRIGGER", self._names[player_id - 1], TRIGGER_SUFFIX)
+		for i in range(count):
+			deck = self._in_zone(player_id, "DECK")
+			if not deck or len(self._in_zone(player_id, "HAND")) >= MAX_HAND_SIZE:
+				break
+			card = self.random.choice(deck)
+			if player_id == 1:
+				# Only the friendly player's cards are revealed as they are drawn
+				yield from self._reveal(card, "HAND")
+			yield from self._move(card, "HAND")
+		yield from self._block_end()
+
+	def _move(self, entity: _Entity, zone: str) -> Iterator[str]:
+		if zone in ("HAND", "PLAY"):
+			entity.zone_pos = len(self._in_zone(entity.controller, zone)) + 1
+		else:
+			entity.zone_pos = 0
+		yield from self._tag_change(entity, "ZONE", zone)
+		entity.zone = zone
+		if entity.zone_pos:
+			yield from self._tag_change(entity, "ZONE_POSITION", entity.zone_pos)
+
+	def _reveal(self, entity: _Entity, zone: str, battlegrounds=False) -> Iterator[str]:
+		card = self._card(entity.card_id, battlegrounds)
+		yield from self._power("SHOW_ENTITY - Updating Entity=%s CardID=%s" % (
+			entity, entity.card_id
+		))
+		entity.revealed = True
+		for tag, value in self._card_tags(card, battlegrounds) + (("ZONE", zone), ):
+			yield from self._power("tag=%s value=%s" % (tag, value), indent=1)
+
+	def _card(self, card_id: str, battlegrounds: bool):
+		cards = BATTLEGROUNDS_CARDS if battlegrounds else CONSTRUCTED_CARDS
+		for card in cards:
+			if card[0] == card_id:
+				return card
+
+	def _create_game(self, battlegrounds: bool) -> Iterator[str]:
+		self._entities = {}
+		self._next_id = FIRST_PLAYER_ENTITY_ID + 1
+		self._names = (
+			self._player_names[0], "The Innkeeper" if battlegrounds else self._player_names[1]
+		)
+		heroes = BATTLEGROUNDS_HEROES if battlegrounds else CONSTRUCTED_HEROES
+
+		yield from self._power("CREATE_GAME")
+		yield from self._power("GameEntity EntityID=%i" % (GAME_ENTITY_ID), indent=1)
+		for tag, value in (
+			("TURN", 1), ("ZONE", "PLAY"), ("ENTITY_ID", GAME_ENTITY_ID),
+			("NEXT_STEP", "BEGIN_MULLIGAN"), ("CARDTYPE", "GAME"), ("STATE", "RUNNING"),
+		):
+			yield from self._power("tag=%s value=%s" % (tag, value), indent=2)
+
+		for player_id in (1, 2):
+			entity_id = FIRST_PLAYER_ENTITY_ID + player_id - 1
+			# The Battlegrounds innkeeper is an AI without an account
+			account = "hi=0 lo=0" if battlegrounds and player_id == 2 else (
+				"hi=%i lo=%i" % (144115198130930503, self.random.randint(1, 10 ** 8))
+			)
+			yield from self._power("Player EntityID=%i PlayerID=%i GameAccountId=[%s]" % (
+				entity_id, player_id, account
+			), indent=1)
+			for tag, value in (
+				("PLAYSTATE", "PLAYING"), ("PLAYER_ID", player_id), ("TEAM_ID", player_id),
+				("ZONE", "PLAY"), ("CONTROLLER", player_id), ("ENTITY_ID", entity_id),
+				("CARDTYPE", "PLAYER"), ("HERO_ENTITY", self._next_id + player_id * 2 - 1),
+			):
+				yield from self._power("tag=%s value=%s" % (tag, value), indent=2)
+
+		game_type = "GT_BATTLEGROUNDS" if battlegrounds else "GT_RANKED"
+		format_type = "FT_WILD" if battlegrounds else "FT_STANDARD"
+		for data in (
+			"GameType=%s" % (game_type), "FormatType=%s" % (format_type), "ScenarioID=2",
+			"PlayerID=1, PlayerName=%s" % (self._names[0]),
+			"PlayerID=2, PlayerName=%s" % (self._names[1]),
+		):
+			yield self._line("GameState.DebugPrintGame()", data)
+
+		for player_id, (hero, hero_name, power, power_name) in zip((1, 2), heroes):
+			yield from self._create((hero, hero_name), player_id, "PLAY", (
+				("CARDTYPE", "HERO"), ("HEALTH", 30),
+			))
+			yield from self._create((power, power_name), player_id, "PLAY", (
+				("CARDTYPE", "HERO_POWER"), ("COST", 2),
+			))
+
+	def _end_game(self, winner: int) -> Iterator[str]:
+		yield from self._block_start("TRIGGER", tokens.GAME_ENTITY, TRIGGER_SUFFIX)
+		for player_id in (1, 2):
+			yield from self._tag_change(
+				self._names[player_id - 1], "PLAYSTATE", "WON" if player_id == winner else "LOST"
+			)
+		yield from self._tag_change(tokens.GAME_ENTITY, "STATE", "COMPLETE")
+		yield from self._block_end()
+
+	def _game_reset(self) -> Iterator[str]:
+		yield from self._block_start("GAME_RESET", tokens.GAME_ENTITY, TRIGGER_SUFFIX)
+		for entity in list(self._entities.values()):
+			if not entity.revealed:
+				continue
+			yield from self._power("FULL_ENTITY - Updating %s CardID=%s" % (
+				entity, entity.card_id
+			))
+			for tag, value in (
+				("ZONE", entity.zone), ("CONTROLLER", entity.controller),
+				("ENTITY_ID", entity.id),
+			):
+				yield from self._power("tag=%s value=%s" % (tag, value), indent=1)
+		yield from self._block_end()
+
+	def _start_turn(self, turn: int, player_id: int) -> Iterator[str]:
+		yield from self._block_start("TRIGGER", tokens.GAME_ENTITY, TRIGGER_SUFFIX)
+		yield from self._tag_change(tokens.GAME_ENTITY, "TURN", turn)
+		for other in (1, 2):
+			yield from self._tag_change(
+				self._names[other - 1], "CURRENT_PLAYER", int(other == player_id)
+			)
+		yield from self._tag_change(
+			self._names[player_id - 1], "RESOURCES", min(10, (turn + 1) // 2)
+		)
+		yield from self._block_end()
+
+	def _options(self, playable: List[_Entity]) -> Iterator[str]:
+		self._options_id += 1
+		method = "GameState.DebugPrintOptions()"
+		yield self._line(method, "id=%i" % (self._options_id))
+		yield self._line(method, "  option 0 type=END_TURN mainEntity= error=NONE errorParam=")
+		for i, entity in enumerate(playable, 1):
+			yield self._line(
+				method, "  option %i type=POWER mainEntity=%s error=NONE errorParam=" % (
+					i, entity
+				)
+			)
+
+	def _attack(self, attacker: _Entity, defender: _Entity, deaths: List[_Entity]):
+		yield from self._block_start("ATTACK", attacker, BLOCK_SUFFIX % (defender))
+		for entity in (defender, attacker):
+			yield from self._tag_change(entity, "DAMAGE", self.random.randint(1, 6))
+			# Heroes take damage but do not die, games end after the last turn
+			if entity.card_id not in self._heroes_ids and self.random.random() < 0.4:
+				deaths.append(entity)
+		yield from self._block_end()
+
+	def _deaths(self, deaths: List[_Entity]) -> Iterator[str]:
+		if not deaths:
+			return
+		yield from self._block_start("DEATHS", tokens.GAME_ENTITY, TRIGGER_SUFFIX)
+		for entity in deaths:
+			yield from self._move(entity, "GRAVEYARD")
+		yield from self._block_end()
+
+	def _constructed_turn(self, turn: int) -> Iterator[str]:
+		player_id = 2 - turn % 2
+		opponent = 3 - player_id
+		yield from self._start_turn(turn, player_id)
+
+		yield from self._draw(player_id)
+
+		hand = self._in_zone(player_id, "HAND")
+		if not self._spectated and player_id == 1:
+			yield from self._options(hand)
+
+		# Play cards
+		for card in self.random.sample(hand, min(len(hand), self.random.randint(0, 2))):
+			if len(self._minions(player_id)) >= MAX_BOARD_SIZE:
+				break
+			yield from self._block_start("PLAY", card, BLOCK_SUFFIX % (0))
+			if not card.revealed:
+				yield from self._reveal(card, "PLAY")
+			yield from self._move(card, "PLAY")
+			yield from self._tag_change(
+				self._names[player_id - 1], "RESOURCES_USED", self.random.randint(1, 10)
+			)
+			yield from self._block_end()
+
+		# Attack
+		deaths: List[_Entity] = []
+		for attacker in self._minions(player_id):
+			if self.random.random() < 0.5:
+				continue
+			targets = [
+				e for e in self._in_zone(opponent, "PLAY")
+				if e.card_id not in self._powers_ids and e not in deaths
+			]
+			yield from self._attack(attacker, self.random.choice(targets), deaths)
+		yield from self._deaths(deaths)
+
+	def _battlegrounds_turn(self, turn: int) -> Iterator[str]:
+		yield from self._start_turn(turn, 1)
+		yield from self._tag_change(
+			self._names[0], "PLAYER_TECH_LEVEL", min(6, 1 + turn // 3)
+		)
+
+		# Shop phase: the innkeeper offers minions, the player buys and plays one
+		yield from self._block_start("TRIGGER", self._names[1], TRIGGER_SUFFIX)
+		shop = []
+		for i in range(self.shop_size):
+			card = self.random.choice(BATTLEGROUNDS_CARDS)
+			yield from self._create(card, 2, "PLAY", self._card_tags(card, True))
+			shop.append(self._entities[self._next_id])
+		yield from self._block_end()
+
+		if len(self._minions(1)) < MAX_BOARD_SIZE:
+			card = self.random.choice(shop)
+			shop.remove(card)
+			yield from self._block_start("PLAY", card, BLOCK_SUFFIX % (0))
+			yield from self._tag_change(card, "CONTROLLER", 1)
+			card.controller = 1
+			yield from self._move(card, "HAND")
+			yield from self._move(card, "PLAY")
+			yield from self._block_end()
+
+		for card in shop:
+			yield from self._move(card, "SETASIDE")
+
+		# Combat against a copy of another player's board
+		yield from self._block_start("TRIGGER", tokens.GAME_ENTITY, TRIGGER_SUFFIX)
+		for i in range(self.random.randint(1, MAX_BOARD_SIZE)):
+			card = self.random.choice(BATTLEGROUNDS_CARDS)
+			yield from self._create(card, 2, "PLAY", self._card_tags(card, True))
+		yield from self._block_end()
+
+		deaths: List[_Entity] = []
+		for attacker in self._minions(1):
+			targets = [e for e in self._minions(2) if e not in deaths]
+			if not targets:
+				break
+			yield from self._attack(attacker, self.random.choice(targets), deaths)
+		yield from self._deaths(deaths)
+
+		# Whatever is left of the opposing board goes away after combat
+		for entity in self._minions(2):
+			yield from self._move(entity, "REMOVEDFROMGAME")
+
+	def _game(self, battlegrounds: bool, spectated: bool, game_reset: bool) -> Iterator[str]:
+		self._spectated = spectated
+		heroes = BATTLEGROUNDS_HEROES if battlegrounds else CONSTRUCTED_HEROES
+		self._heroes_ids = {hero[0] for hero in heroes}
+		self._powers_ids = {hero[2] for hero in heroes}
+
+		if spectated:
+			yield self._spectator(tokens.SPECTATOR_MODE_BEGIN_GAME)
+			yield self._spectator(tokens.SPECTATOR_MODE_BEGIN_FIRST)
+
+		yield from self._create_game(battlegrounds)
+
+		if not battlegrounds:
+			for player_id in (1, 2):
+				for i in range(self.deck_size):
+					card = self.random.choice(CONSTRUCTED_CARDS)
+					yield from self._create(card, player_id, "DECK", revealed=False)
+			# Opening hands; the mulligan itself is not generated
+			yield from self._draw(1, 3)
+			yield from self._draw(2, 4)
+
+		for turn in range(1, self.turns + 1):
+			if battlegrounds:
+				yield from self._battlegrounds_turn(turn)
+			else:
+				yield from self._constructed_turn(turn)
+			if game_reset and turn == self.turns // 2:
+				yield from self._game_reset()
+
+		yield from self._end_game(self.random.randint(1, 2))
+
+		if spectated:
+			yield self._spectator(tokens.SPECTATOR_MODE_END_MODE)
+
+
+def write_realtime(
+	path: str,
+	lines,
+	rate: float,
+	append: bool = False,
+	clock=time.monotonic,
+	sleep=time.sleep
+) -> int:
+	"""
+	Write `lines` to `path` at `rate` lines per second, flushing the file whenever
+	the writer gets ahead of schedule so readers see lines as they come.
+	A rate of 0 writes everything at once. Returns the number of lines written.
+	"""
+	count = 0
+	with open(path, "a" if append else "w", encoding="utf-8", newline="\n") as f:
+		start = clock()
+		for line in lines:
+			f.write(line)
+			count += 1
+			if rate:
+				delay = start + count / rate - clock()
+				if delay > 0:
+					f.flush()
+					sleep(delay)
+	return count
+
+
+def main():
+	p = ArgumentParser(description=__doc__.strip().splitlines()[0])
+	p.add_argument("output", metavar="OUTPUT")
+	p.add_argument("--games", type=int, default=1)
+	p.add_argument("--turns", type=int, default=10)
+	p.add_argument("--deck-size", type=int, default=30)
+	p.add_argument("--shop-size", type=int, default=5)
+	p.add_argument(
+		"--battlegrounds", type=float, default=0.0, help="Share of Battlegrounds games"
+	)
+	p.add_argument("--spectator", type=float, default=0.0, help="Share of spectated games")
+	p.add_argument(
+		"--game-reset", type=float, default=0.0, help="Share of games with a GAME_RESET"
+	)
+	p.add_argument(
+		"--no-power-task-list", action="store_false", dest="power_task_list",
+		help="Do not repeat blocks in PowerTaskList"
+	)
+	p.add_argument("--seed", type=int, default=0)
+	p.add_argument(
+		"--rate", type=float, default=0, help="Lines per second to append in real time"
+	)
+	p.add_argument("--append", action="store_true", help="Append to OUTPUT")
+	args = p.parse_args()
+
+	generator = PowerLogGenerator(
+		games=args.games,
+		turns=args.turns,
+		deck_size=args.deck_size,
+		shop_size=args.shop_size,
+		battlegrounds=args.battlegrounds,
+		spectator=args.spectator,
+		game_reset=args.game_reset,
+		power_task_list=args.power_task_list,
+		seed=args.seed,
+		now=datetime.now if args.rate else None,
+	)
+	count = write_realtime(args.output, generator, args.rate, append=args.append)
+	print("%s: %i lines" % (args.output, count))
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
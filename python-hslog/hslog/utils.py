@@ -1,8 +1,16 @@
+from datetime import datetime, time
+from functools import lru_cache
+
+from aniso8601 import parse_time
 from hearthstone.enums import TAG_TYPES, GameTag, GameType
 
 from hslog.exceptions import NoSuchEnum
 
 
+# The same tag/value strings repeat throughout a log, so the lookups are cached.
+# Failed lookups are not cached and raise every time.
+
+@lru_cache(maxsize=1024)
 def parse_enum(enum, value):
 	if value.isdecimal():
 		value = int(value)
@@ -13,6 +21,7 @@ def parse_enum(enum, value):
 	return value
 
 
+@lru_cache(maxsize=8192)
 def parse_tag(tag, value):
 	tag = parse_enum(GameTag, tag)
 	if tag in TAG_TYPES:
@@ -24,6 +33,106 @@ def parse_tag(tag, value):
 	return tag, value
 
 
+@lru_cache(maxsize=8192)
+def restore_tag(tag: int, value: int):
+	"""
+	Turn a (tag, value) pair stored as plain ints back into GameTag and value enum
+	members, for the tags and values that have one.
+	"""
+	try:
+		tag = GameTag(tag)
+	except ValueError:
+		return tag, value
+	enum = TAG_TYPES.get(tag)
+	if isinstance(enum, type):
+		try:
+			value = enum(value)
+		except ValueError:
+			pass
+	return tag, value
+
+
+def parse_cache_stats():
+	"""
+	Return the hit/miss counters of the parse_tag and parse_enum caches, keyed by
+	function name.
+	"""
+	stats = {}
+	for func in (parse_tag, parse_enum):
+		info = func.cache_info()
+		lookups = info.hits + info.misses
+		stats[func.__name__] = {
+			"hits": info.hits,
+			"misses": info.misses,
+			"hit_rate": info.hits / lookups if lookups else 0.0,
+			"size": info.currsize,
+			"maxsize": info.maxsize,
+		}
+	return stats
+
+
+def parse_powerlog_time(ts):
+	"""
+	Parse a Power.log timestamp ("HH:MM:SS" with an optional ".fffffff" fraction)
+	into a datetime.time. Like aniso8601, extra fraction digits are truncated to
+	microseconds. Anything not in that layout is left to aniso8601.parse_time.
+	"""
+	length = len(ts)
+	if length >= 8 and ts[2] == ":" and ts[5] == ":" and (
+		length == 8 or (length > 9 and ts[8] == ".")
+	):
+		digits = ts[:2] + ts[3:5] + ts[6:8] + ts[9:]
+		if digits.isascii() and digits.isdigit():
+			hour, minute, second = int(ts[:2]), int(ts[3:5]), int(ts[6:8])
+			if hour < 24 and minute < 60 and second < 60:
+				microsecond = int(ts[9:15].ljust(6, "0")) if length > 9 else 0
+				return time(hour, minute, second, microsecond)
+	return parse_time(ts)
+
+
+def powerlog_method_offset(line: str) -> int:
+	"""
+	Return the offset of the method name in a Power.log line, which follows the level
+	and the timestamp ("D 02:59:14.6088620 GameState.DebugPrintPower() - ..."),
+	or -1 if the line does not start that way. The timestamp itself is not checked.
+	"""
+	if len(line) > 2 and line[1] == " " and line[0] in "DWE":
+		end = line.find(" ", 2)
+		if end != -1:
+			return end + 1
+	return -1
+
+
+class LazyTimestamp:
+	"""
+	A Power.log timestamp whose parsing is deferred until resolve() is called.
+	`date` is the log date the timestamp falls on, or None when it is unknown,
+	in which case resolve() returns a plain datetime.time.
+	"""
+
+	__slots__ = ("raw", "date", "tzinfo", "_value")
+
+	def __init__(self, raw, date=None, tzinfo=None):
+		self.raw = raw
+		self.date = date
+		self.tzinfo = tzinfo
+		self._value = None
+
+	def __repr__(self):
+		return "%s(%r, date=%r)" % (self.__class__.__name__, self.raw, self.date)
+
+	def __str__(self):
+		return str(self.resolve())
+
+	def resolve(self):
+		if self._value is None:
+			value = parse_powerlog_time(self.raw)
+			if self.date is not None:
+				value = datetime.combine(self.date, value, tzinfo=self.tzinfo)
+			self._value = value
+		return self._value
+
+
 def is_mercenaries_game_type(game_type: GameType):
 	return game_type in (
 		GameType.GT_MERCENARIES_AI_VS_AI,
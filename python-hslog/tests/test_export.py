@@ -1,8 +1,16 @@
 import time
+from io import StringIO
 
-from hslog.export import BaseExporter, CompositeExporter, FriendlyPlayerExporter
+from hearthstone.enums import GameTag, Zone
+
+from hslog import LogParser
+from hslog.export import (
+	BaseExporter, CompositeExporter, EntityTreeExporter,
+	FriendlyPlayerExporter, IncrementalEntityTreeExporter
+)
 from hslog.packets import Block, SubSpell
 
+from . import data
 from .conftest import logfile
 
 
@@ -316,7 +324,108 @@ class TestCompositeExporter:
 		assert exporter2.handle_vo_spell_calls == 1
 
 
+class TestEntityTreeExporter:
+
+	def test_find_entities_by_zone(self):
+		parser = LogParser()
+		parser.read(StringIO(data.INITIAL_GAME))
+		parser.read(StringIO(data.FULL_ENTITY))
+		parser.flush()
+
+		exporter = EntityTreeExporter(parser.games[0])
+		exporter.export()
+		assert [e.id for e in exporter.find_entities_by_zone(1, Zone.DECK)] == [4]
+		assert [e.id for e in exporter.find_entities_by_zone(1)] == [2, 4]
+		assert [e.id for e in exporter.find_entities_by_zone(zone=Zone.PLAY)] == [1, 2, 3]
+		assert [e.id for e in exporter.find_entities_by_zone()] == [1, 2, 3, 4]
+
+		parser.read(StringIO(data.CONTROLLER_CHANGE))
+		parser.read(StringIO(
+			"D 22:25:48.0708939 GameState.DebugPrintPower() - "
+			"TAG_CHANGE Entity=4 tag=ZONE value=HAND\n"
+		))
+		exporter = IncrementalEntityTreeExporter(parser.games[0])
+		exporter.export()
+		assert exporter.find_entities_by_zone(1, Zone.DECK) == []
+		assert [e.id for e in exporter.find_entities_by_zone(2, Zone.HAND)] == [4]
+		assert [e.id for e in exporter.find_entities_by_zone(2)] == [3, 4]
+
+
+class TestIncrementalEntityTreeExporter:
+
+	def test_export_new_packets_only(self):
+		parser = LogParser()
+		parser.read(StringIO(data.INITIAL_GAME))
+		parser.read(StringIO(data.FULL_ENTITY))
+
+		exporter = IncrementalEntityTreeExporter(parser.games[0])
+		game = exporter.export().game
+		assert len(game.players) == 2
+
+		# The FULL_ENTITY may still receive tags, so it is held back
+		assert game.find_entity_by_id(4) is None
+
+		parser.read(StringIO(data.CONTROLLER_CHANGE))
+		assert exporter.export().game is game
+
+		entity = game.find_entity_by_id(4)
+		assert entity.zone == Zone.DECK
+		assert entity.tags[GameTag.CONTROLLER] == 2
+
+		# Nothing new to export
+		assert exporter.export().game is game
+		assert entity.tags[GameTag.CONTROLLER] == 2
+
+	def test_open_blocks(self):
+		prefix = "D 22:25:48.0678873 GameState.DebugPrintPower() - "
+		lines = [
+			"BLOCK_START BlockType=TRIGGER Entity=GameEntity EffectCardId= "
+			"EffectIndex=-1 Target=0 SubOption=-1 TriggerKeyword=0",
+			"    FULL_ENTITY - Creating ID=4 CardID=",
+			"        tag=ZONE value=DECK",
+			"        tag=CONTROLLER value=1",
+			"    BLOCK_START BlockType=POWER Entity=GameEntity EffectCardId= "
+			"EffectIndex=-1 Target=0 SubOption=-1",
+			"        TAG_CHANGE Entity=4 tag=ZONE value=HAND",
+			"    BLOCK_END",
+			"    TAG_CHANGE Entity=4 tag=CONTROLLER value=2",
+			"BLOCK_END",
+		]
+
+		parser = LogParser()
+		parser.read(StringIO(data.INITIAL_GAME))
+		exporter = IncrementalEntityTreeExporter(parser.games[0])
+
+		for line in lines:
+			parser.read(StringIO(prefix + line))
+			exporter.export()
+
+		entity = exporter.game.find_entity_by_id(4)
+		assert entity.zone == Zone.HAND
+		assert entity.tags[GameTag.CONTROLLER] == 2
+
+		full_game = EntityTreeExporter(parser.games[0]).export().game
+		assert entity.tags == full_game.find_entity_by_id(4).tags
+
+		# Both blocks ended, so the exporter is back at the top level
+		assert len(exporter._stack) == 1
+
+
 class TestFriendlyPlayerExporter:
+	def test_cached_on_packet_tree(self, parser):
+		# Player 1 has lo=0, so it is treated as the AI opponent
+		parser.read(StringIO(data.INITIAL_GAME))
+
+		packet_tree = parser.games[0]
+		assert packet_tree.friendly_player is None
+		assert FriendlyPlayerExporter(packet_tree).export() == 2
+		assert packet_tree.friendly_player == 2
+
+		# Later exports do not walk the packet tree again
+		fpe = FriendlyPlayerExporter(packet_tree)
+		fpe.export_packet = None
+		assert fpe.export() == 2
+
 	def test_inferrable(self, parser):
 		with open(logfile("friendly_player_id_is_1.power.log")) as f:
 			parser.read(f)
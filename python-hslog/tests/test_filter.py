@@ -21,6 +21,17 @@ class TestBattlegroundsLogFilter:
         assert lf2.num_lines_read == 1
         assert lf2.num_lines_emitted == 1
 
+    def test_other_methods_pass_through(self):
+        lines = (
+            "D 00:13:20.7502897 PowerTaskList.DebugPrintPower() -     "
+            "TAG_CHANGE Entity=22 tag=10 value=60\n"
+            "D 00:13:20.7502897 GameState.DebugPrintPowerList() - Count=1\n"
+        )
+        lf = BattlegroundsLogFilter(StringIO(lines))
+
+        assert "".join(lf) == lines
+        assert lf.num_lines_read == 2
+
     def test_attacks_minion(self):
         attack1 = StringIO(
             "D 00:14:49.3366557 GameState.DebugPrintPower() -     "
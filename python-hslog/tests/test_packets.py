@@ -0,0 +1,15 @@
+import inspect
+
+from hslog import packets
+
+
+def test_packets_have_no_dict():
+	classes = [
+		cls for _, cls in inspect.getmembers(packets, inspect.isclass)
+		if issubclass(cls, packets.Packet)
+	]
+	classes.append(packets.CreateGame.Player)
+	for cls in classes:
+		# A subclass without __slots__ would silently bring the __dict__ back
+		assert "__slots__" in vars(cls), cls
+		assert cls.__dictoffset__ == 0, cls
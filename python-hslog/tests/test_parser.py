@@ -1,17 +1,19 @@
 from datetime import datetime, time, timedelta
-from io import StringIO
+from io import BytesIO, StringIO
 from unittest.mock import patch
 
 import pytest
-from aniso8601 import parse_datetime, parse_time
+from aniso8601 import parse_datetime
 from hearthstone.enums import (
-	CardType, ChoiceType, GameTag, OptionType, PlayState, PowerType, State, Step, Zone
+	BlockType, CardType, ChoiceType, GameTag, OptionType, PlayState, PowerType, State, Step,
+	Zone
 )
 
 from hslog import LogParser, packets
 from hslog.exceptions import CorruptLogError, ParsingError
 from hslog.packets import TagChange
-from hslog.parser import parse_initial_tag
+from hslog.parser import ParserCheckpoint, ParserObserver, parse_initial_tag
+from hslog.utils import LazyTimestamp, parse_powerlog_time
 
 from . import data
 
@@ -167,7 +169,7 @@ class TestLogParser:
 
 		parser.read(StringIO(data.INITIAL_GAME))
 
-		with patch("hslog.parser.parse_time", wraps=parse_time) as spy:
+		with patch("hslog.parser.parse_powerlog_time", wraps=parse_powerlog_time) as spy:
 			parser.read(StringIO(data.REPEATED_TIMESTAMP))
 		spy.assert_called_once()  # The same repeated timestamp should only be parsed once
 
@@ -184,6 +186,228 @@ class TestLogParser:
 		# Timestamp has to be truncated
 		assert parser.games[0].packets[1].ts == time(14, 43, 59, 999999)
 
+	@pytest.mark.parametrize("current_date", [
+		None, parse_datetime("2015-01-01T02:58:00+0200")
+	])
+	def test_lazy_timestamps(self, current_date):
+		def parse(lazy_timestamps):
+			parser = LogParser(lazy_timestamps=lazy_timestamps)
+			parser._current_date = current_date
+			# The last log goes back in time, so it rolls over to the next day
+			for log in (data.INITIAL_GAME, data.FULL_ENTITY, data.UNROUNDABLE_TIMESTAMP):
+				parser.read(StringIO(log))
+			parser.flush()
+			return parser.games[0]
+
+		packet_tree = parse(lazy_timestamps=True)
+		packet = packet_tree.packets[-1]
+		assert isinstance(packet._ts, LazyTimestamp)
+		assert not isinstance(packet.ts, LazyTimestamp)
+		assert packet._ts == packet.ts
+
+		eager = [packet.ts for packet in parse(lazy_timestamps=False).recursive_iter()]
+		lazy = [packet.ts for packet in packet_tree.recursive_iter()]
+		assert lazy == eager
+		assert packet_tree.ts == eager[0]
+		if current_date is not None:
+			assert lazy[-1] == datetime(2015, 1, 2, 14, 43, 59, 999999, current_date.tzinfo)
+
+	def test_columnar_tag_changes(self):
+		def parse(columnar_tag_changes):
+			parser = LogParser(columnar_tag_changes=columnar_tag_changes)
+			for log in (
+				data.INITIAL_GAME, data.FULL_ENTITY, data.CONTROLLER_CHANGE,
+				data.UNROUNDABLE_TIMESTAMP
+			):
+				parser.read(StringIO(log))
+			parser.flush()
+			return parser.games[0]
+
+		def describe(packet_tree):
+			return [
+				(type(p), p.packet_id, p.ts, getattr(p, "entity", None), getattr(p, "tag", None),
+					getattr(p, "value", None))
+				for p in packet_tree.recursive_iter()
+			]
+
+		packet_tree = parse(columnar_tag_changes=True)
+		store = packet_tree.tag_changes
+		# Tag changes on player names are kept as packets
+		assert len(store) == 6
+		assert describe(packet_tree) == describe(parse(columnar_tag_changes=False))
+
+		zone_positions = list(store.find(entity=25, tag=GameTag.ZONE_POSITION))
+		assert len(zone_positions) == 1
+		assert zone_positions[0].value == 0
+		controller, = store.find(tag=GameTag.CONTROLLER)
+		assert controller.entity == 4
+		assert controller.value == 2
+
+		# The store survives a checkpoint
+		parser = LogParser(columnar_tag_changes=True)
+		parser.read(StringIO(data.INITIAL_GAME))
+		restored = LogParser()
+		restored.restore(parser.checkpoint())
+		restored.read(StringIO(data.FULL_ENTITY))
+		restored.read(StringIO(data.CONTROLLER_CHANGE))
+		packet = restored.games[0].packets[-1]
+		assert isinstance(packet, TagChange)
+		assert packet.value == 2
+
+	def test_max_games(self):
+		completed = []
+		parser = LogParser(max_games=1, on_game_completed=completed.append)
+		parser.read(StringIO(data.INITIAL_GAME))
+		first_game = parser.games[0]
+		assert completed == []
+
+		# The callback must not end up in checkpoints
+		checkpoint = parser.checkpoint()
+
+		parser.read(StringIO(data.INITIAL_GAME))
+		parser.read(StringIO(data.INITIAL_GAME))
+		parser.flush()
+		assert len(completed) == 2
+		assert completed[0] is first_game
+		assert parser.games == [parser._parsing_state.packet_tree]
+		assert completed[1] is not parser.games[0]
+
+		restored = LogParser(max_games=2)
+		restored.restore(checkpoint)
+		for _ in range(3):
+			restored.read(StringIO(data.INITIAL_GAME))
+		assert len(restored.games) == 2
+
+		with pytest.raises(ValueError):
+			LogParser(max_games=0)
+
+	def test_observer(self):
+		class Recorder(ParserObserver):
+			def __init__(self):
+				self.events = []
+
+			def on_game_created(self, packet_tree):
+				self.events.append(("created", packet_tree))
+
+			def on_block_end(self, block):
+				self.events.append(("block_end", block.type))
+
+			def on_tag_change(self, packet_tree, entity_id, tag, value):
+				self.events.append(("tag_change", entity_id, tag, value))
+
+			def on_entity(self, packet_tree, packet):
+				self.events.append(("entity", packet.__class__, packet.entity))
+
+			def on_game_ended(self, packet_tree):
+				self.events.append(("ended", packet_tree))
+
+		recorder = Recorder()
+		parser = LogParser()
+		parser.add_observer(recorder)
+		parser.read(StringIO(data.INITIAL_GAME))
+		packet_tree = parser.games[0]
+		assert recorder.events == [("created", packet_tree)]
+
+		parser.read(StringIO(data.FULL_ENTITY))
+		parser.read(StringIO(data.CONTROLLER_CHANGE))
+		parser.read(StringIO(data.REPEATED_TIMESTAMP))
+		assert recorder.events[1:] == [
+			("entity", packets.FullEntity, 4),
+			("tag_change", 4, GameTag.CONTROLLER, 2),
+			("block_end", BlockType.PLAY),
+			("block_end", BlockType.PLAY),
+		]
+
+		del recorder.events[:]
+		parser.read(StringIO(
+			"D 02:59:14.7000000 GameState.DebugPrintPower() - "
+			"SHOW_ENTITY - Updating Entity=4 CardID=EX1_001\n"
+			"D 02:59:14.7000000 GameState.DebugPrintPower() - "
+			"    tag=ZONE value=HAND\n"
+			"D 02:59:14.8000000 GameState.DebugPrintPower() - "
+			"CHANGE_ENTITY - Updating Entity=4 CardID=EX1_002\n"
+			"D 02:59:14.9000000 GameState.DebugPrintPower() - "
+			"HIDE_ENTITY - Entity=4 tag=ZONE value=DECK\n"
+		))
+		assert recorder.events == [
+			("entity", packets.ShowEntity, 4),
+			("entity", packets.ChangeEntity, 4),
+			("entity", packets.HideEntity, 4),
+		]
+
+		# Observers are not part of checkpoints
+		restored = LogParser()
+		restored.restore(parser.checkpoint())
+		assert restored._parsing_state.observers == []
+
+		del recorder.events[:]
+		parser.read(StringIO(
+			"D 02:59:15.0000000 GameState.DebugPrintPower() - "
+			"TAG_CHANGE Entity=GameEntity tag=STATE value=COMPLETE"
+		))
+		assert recorder.events == [
+			("tag_change", 1, GameTag.STATE, State.COMPLETE),
+			("ended", packet_tree),
+		]
+
+		parser.remove_observer(recorder)
+		parser.read(StringIO(data.CONTROLLER_CHANGE))
+		assert len(recorder.events) == 2
+
+	def test_entities_profile(self):
+		def parse(profile):
+			parser = LogParser(profile=profile)
+			for log in (
+				data.INITIAL_GAME, data.FULL_ENTITY, data.OPTIONS_WITH_ERRORS,
+				data.BGS_SUB_SPELL_BLOCK, data.VO_SPELL, data.SUB_SPELL_BLOCK,
+				data.CONTROLLER_CHANGE
+			):
+				parser.read(StringIO(log))
+			parser.flush()
+			return parser.games[0]
+
+		def walk(packets):
+			for packet in packets:
+				yield packet
+				yield from walk(getattr(packet, "packets", ()))
+
+		def tag_changes(packet_tree):
+			return [
+				(p.entity, p.tag, p.value)
+				for p in walk(packet_tree.packets) if isinstance(p, TagChange)
+			]
+
+		full = parse("full")
+		entities = parse("entities")
+		assert tag_changes(entities) == tag_changes(full)
+		skipped = (packets.Options, packets.SubSpell, packets.MetaData, packets.VOSpell)
+		assert any(isinstance(p, skipped) for p in walk(full.packets))
+		assert not any(isinstance(p, skipped) for p in walk(entities.packets))
+
+		with pytest.raises(ValueError):
+			LogParser(profile="cards")
+
+	def test_line_prefilter(self):
+		parser = LogParser()
+		tag_change = (
+			"D 02:59:14.6500380 GameState.DebugPrintPower() - TAG_CHANGE Entity=2 tag=1 value=1"
+		)
+
+		# Lines before the first CREATE_GAME and of unhandled methods are ignored
+		parser.read(StringIO(tag_change))
+		parser.read(StringIO(data.INITIAL_GAME))
+		parser.read(StringIO(tag_change.replace("GameState.", "PowerTaskList.")))
+		parser.read(StringIO(tag_change.replace("DebugPrintPower", "DebugPrintPowerList")))
+		assert len(parser.games) == 1
+		assert len(parser.games[0].packets) == 1
+
+		parser.read(StringIO(tag_change))
+		assert len(parser.games[0].packets) == 2
+
+		# Lines that do not start with a level and a timestamp still fail
+		with pytest.raises(ParsingError):
+			parser.read_line("X 02:59:14.6500380 GameState.DebugPrintPower() - CREATE_GAME")
+
 	def test_info_outside_of_metadata(self):
 		parser = LogParser()
 		parser.read(StringIO(data.INITIAL_GAME))
@@ -554,3 +778,35 @@ class TestLogParser:
 		packet_tree = parser.games[0]
 		tag_changes = [p for p in packet_tree.packets[1] if isinstance(p, TagChange)]
 		assert len(tag_changes) == 6
+
+	def test_checkpoint_restore(self):
+		parser = LogParser()
+		parser.read(StringIO(data.INITIAL_GAME))
+		checkpoint = parser.checkpoint(offset=len(data.INITIAL_GAME))
+
+		# Parsing after the checkpoint must not leak into it
+		parser.read(StringIO(data.FULL_ENTITY))
+
+		fp = BytesIO()
+		checkpoint.dump(fp)
+		fp.seek(0)
+		checkpoint = ParserCheckpoint.load(fp)
+		assert checkpoint.offset == len(data.INITIAL_GAME)
+
+		restored = LogParser()
+		assert restored.restore(checkpoint) == len(data.INITIAL_GAME)
+		assert len(restored.games) == 1
+		assert len(restored.games[0].packets) == 1
+
+		restored.read(StringIO(data.FULL_ENTITY))
+		restored.read(StringIO(data.CONTROLLER_CHANGE))
+		restored.flush()
+
+		packet_tree = restored.games[0]
+		assert restored.player_manager.get_controller_by_entity_id(4) == 2
+		assert packet_tree.packets[-1].power_type == PowerType.TAG_CHANGE
+		assert packet_tree.packets[-1].ts == time(22, 25, 48, 70893)
+
+		game = packet_tree.export().game
+		assert len(game.players) == 2
+		assert game.find_entity_by_id(4).tags[GameTag.CONTROLLER] == 2
@@ -0,0 +1,65 @@
+import pytest
+from hearthstone.enums import BlockType, GameTag, State
+
+from hslog import LogParser
+from hslog.export import FriendlyPlayerExporter
+from hslog.packets import Block
+from hslog.synthetic import PowerLogGenerator, write_realtime
+
+
+def test_generator_is_deterministic():
+	lines = list(PowerLogGenerator(games=2, battlegrounds=0.5, seed=1))
+	assert lines == list(PowerLogGenerator(games=2, battlegrounds=0.5, seed=1))
+	assert lines != list(PowerLogGenerator(games=2, battlegrounds=0.5, seed=2))
+	assert all(line.endswith("\n") for line in lines)
+
+
+@pytest.mark.parametrize("battlegrounds", [False, True])
+def test_generated_games_parse_and_export(battlegrounds):
+	generator = PowerLogGenerator(
+		games=3, turns=8, battlegrounds=float(battlegrounds), spectator=1, game_reset=1
+	)
+	parser = LogParser()
+	parser.read(generator)
+	parser.flush()
+
+	assert len(parser.games) == 3
+	for packet_tree in parser.games:
+		assert packet_tree.spectator_mode
+		game = packet_tree.export().game
+		assert game.tags[GameTag.STATE] == State.COMPLETE
+		assert len(game.players) == 2
+		assert FriendlyPlayerExporter(packet_tree).export() == 1
+		assert any(
+			isinstance(packet, Block) and packet.type == BlockType.GAME_RESET
+			for packet in packet_tree
+		)
+
+
+def test_power_task_list():
+	lines = [line.split(" ", 2)[2] for line in PowerLogGenerator()]
+	game_state = [line.split(" - ", 1)[1] for line in lines if line.startswith("GameState")]
+	task_list = [line.split(" - ", 1)[1] for line in lines if line.startswith("PowerTaskList")]
+	assert task_list
+	assert set(task_list) <= set(game_state)
+
+	lines = list(PowerLogGenerator(power_task_list=False))
+	assert not any("PowerTaskList" in line for line in lines)
+
+
+def test_write_realtime(tmpdir):
+	now = [0.0]
+	sleeps = []
+
+	def sleep(delay):
+		sleeps.append(delay)
+		now[0] += delay
+
+	path = str(tmpdir.join("Power.log"))
+	lines = ["D 20:00:00.0000000 GameState.DebugPrintPower() - %i\n" % (i) for i in range(50)]
+	assert write_realtime(path, lines, rate=10, clock=lambda: now[0], sleep=sleep) == 50
+	assert sum(sleeps) == pytest.approx(5)
+	assert write_realtime(path, lines[:5], rate=0, append=True) == 5
+
+	with open(path) as f:
+		assert f.readlines() == lines + lines[:5]
@@ -0,0 +1,65 @@
+from datetime import time
+
+import pytest
+from aniso8601 import parse_time
+from hearthstone.enums import GameTag, Zone
+
+from hslog.exceptions import NoSuchEnum
+from hslog.utils import (
+	parse_cache_stats, parse_enum, parse_powerlog_time, parse_tag, powerlog_method_offset
+)
+
+
+def test_parse_tag_cached():
+	parse_tag.cache_clear()
+	assert parse_tag("ZONE", "HAND") == (GameTag.ZONE, Zone.HAND)
+	assert parse_tag("ZONE", "HAND") == (GameTag.ZONE, Zone.HAND)
+	assert parse_tag("ATK", "3") == (GameTag.ATK, 3)
+
+	stats = parse_cache_stats()["parse_tag"]
+	assert stats["hits"] == 1
+	assert stats["misses"] == 2
+	assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+
+def test_parse_enum_failures_not_cached():
+	parse_tag.cache_clear()
+	for _ in range(2):
+		with pytest.raises(NoSuchEnum):
+			parse_enum(Zone, "NOT_A_ZONE")
+		with pytest.raises(NoSuchEnum):
+			parse_tag("NOT_A_TAG", "1")
+		with pytest.raises(NotImplementedError):
+			parse_tag("ATK", "INVALID")
+
+	assert parse_tag.cache_info().currsize == 0
+
+
+@pytest.mark.parametrize("ts", [
+	"02:59:14.6088620",
+	"14:43:59.9999997",
+	"00:00:00.0000000",
+	"23:59:59.9999999",
+	"22:25:48.0708930",
+	"02:59:14.6",
+	"02:59:14",
+	"24:00:00",
+	"02:59:14,5",
+])
+def test_parse_powerlog_time(ts):
+	assert parse_powerlog_time(ts) == parse_time(ts)
+
+
+def test_parse_powerlog_time_invalid():
+	assert parse_powerlog_time("02:59:14.6088620") == time(2, 59, 14, 608862)
+	for ts in ("2:59:14.60", "02:60:14.6088620", "02:59:1x.6088620"):
+		with pytest.raises(ValueError):
+			parse_powerlog_time(ts)
+
+
+def test_powerlog_method_offset():
+	line = "D 02:59:14.6088620 GameState.DebugPrintPower() - CREATE_GAME"
+	assert line[powerlog_method_offset(line):].startswith("GameState.DebugPrintPower()")
+	assert powerlog_method_offset("W 9:09:23 GameState.ReportStuck() - Stuck") == 10
+	for line in ("", "D", "D 02:59:14.6088620", "X 02:59:14 GameState", "D02:59:14 GameState"):
+		assert powerlog_method_offset(line) == -1
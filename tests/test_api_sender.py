@@ -0,0 +1,200 @@
+import json
+
+import pytest
+import requests
+
+from api_sender import BREAKER_THRESHOLD, MAX_RETRIES, CircuitBreaker, LogApiSender
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.body = body
+        self.text = json.dumps(body) if body is not None else ""
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(str(self.status_code), response=self)
+
+
+class FakeSession:
+    """Replies with the queued responses in order, then with 200 OK."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.payloads = []
+
+    def request(self, method, url, headers=None, data=None, timeout=None):
+        self.payloads.append(json.loads(data))
+        response = self.responses.pop(0) if self.responses else FakeResponse()
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def sender(monkeypatch):
+    sender = LogApiSender()
+    sender.api_url = "http://127.0.0.1/api/log"
+    sender.session = FakeSession()
+    monkeypatch.setattr(sender, "_backoff_delay", lambda attempt: 0)
+    return sender
+
+
+def cards(*cards):
+    return [{"id": entity_id, "card_id": card_id, "zone": "HAND"} for entity_id, card_id in cards]
+
+
+def snapshot(my_cards=(), enemy_cards=()):
+    return {"my_cards": cards(*my_cards), "enemy_cards": cards(*enemy_cards)}
+
+
+def send(sender, log_data, *responses):
+    sender.session.responses.extend(responses)
+    sent = len(sender.session.payloads)
+    result = sender._send_log_data_thread(log_data)
+    return result, sender.session.payloads[sent:]
+
+
+class TestDeltaProtocol:
+    def test_full_then_delta(self, sender):
+        result, (payload, ) = send(sender, snapshot([(4, "EX1_001"), (5, "EX1_002")]))
+        assert result["success"]
+        assert payload["type"] == "full"
+        assert (payload["seq"], payload["base_seq"]) == (1, 0)
+        assert [card["id"] for card in payload["my_cards"]] == [4, 5]
+
+        result, (payload, ) = send(sender, snapshot([(4, "EX1_001"), (6, "EX1_003")], [(7, "CS2_1")]))
+        assert payload["type"] == "delta"
+        assert (payload["seq"], payload["base_seq"]) == (2, 1)
+        assert payload["my_cards"] == {
+            "added": cards((6, "EX1_003")), "removed": [5], "changed": [],
+        }
+        assert payload["enemy_cards"]["added"] == cards((7, "CS2_1"))
+
+    def test_skip_unchanged(self, sender):
+        send(sender, snapshot([(4, "EX1_001")]))
+        result, payloads = send(sender, snapshot([(4, "EX1_001")]))
+        assert result == {"success": True, "skipped": True}
+        assert payloads == []
+        assert sender.get_stats()["skipped"] == 1
+
+    def test_delta_after_failed_send_uses_acked_state(self, sender):
+        send(sender, snapshot([(4, "EX1_001")]))
+        result, _ = send(sender, snapshot([(4, "EX1_001"), (5, "EX1_002")]), FakeResponse(400))
+        assert not result["success"]
+
+        result, (payload, ) = send(sender, snapshot([(5, "EX1_002"), (6, "EX1_003")]))
+        assert payload["type"] == "delta"
+        assert payload["base_seq"] == 1
+        assert payload["my_cards"] == {
+            "added": cards((5, "EX1_002"), (6, "EX1_003")), "removed": [4], "changed": [],
+        }
+
+    def test_resync_on_conflict(self, sender):
+        send(sender, snapshot([(4, "EX1_001")]))
+        result, (payload, ) = send(sender, snapshot([(5, "EX1_002")]), FakeResponse(409))
+        assert payload["type"] == "delta"
+        assert result["status_code"] == 409
+
+        result, (payload, ) = send(sender, snapshot([(5, "EX1_002")]))
+        assert payload["type"] == "full"
+        assert payload["base_seq"] == 1
+
+    def test_resync_requested_by_server(self, sender):
+        send(sender, snapshot([(4, "EX1_001")]), FakeResponse(200, {"resync": True}))
+        result, (payload, ) = send(sender, snapshot([(4, "EX1_001")]))
+        assert payload["type"] == "full"
+        assert payload["base_seq"] == 0
+
+        # Acknowledged normally this time
+        result, payloads = send(sender, snapshot([(4, "EX1_001")]))
+        assert result["skipped"]
+
+
+class TestRetries:
+    @pytest.mark.parametrize("error", [
+        FakeResponse(500),
+        FakeResponse(503),
+        FakeResponse(429),
+        requests.exceptions.ConnectionError("connection refused"),
+        requests.exceptions.Timeout("timed out"),
+    ])
+    def test_retried_errors(self, sender, error):
+        result, payloads = send(sender, snapshot([(4, "EX1_001")]), error, error)
+        assert result["success"]
+        assert len(payloads) == 3
+        assert sender.get_stats()["retried"] == 2
+        assert sender.breakers["log"].state == CircuitBreaker.CLOSED
+
+    @pytest.mark.parametrize("status_code", [400, 401, 404, 422])
+    def test_client_errors_are_not_retried(self, sender, status_code):
+        result, payloads = send(sender, snapshot([(4, "EX1_001")]), FakeResponse(status_code))
+        assert not result["success"]
+        assert result["status_code"] == status_code
+        assert len(payloads) == 1
+        stats = sender.get_stats()
+        assert (stats["retried"], stats["failed"]) == (0, 1)
+        # The endpoint itself answered, so it counts as a success for the breaker
+        breaker = sender.breakers["log"]
+        assert (breaker.state, breaker.failures) == (CircuitBreaker.CLOSED, 0)
+
+    def test_gives_up_after_max_retries(self, sender):
+        errors = [FakeResponse(500)] * (MAX_RETRIES + 1)
+        result, payloads = send(sender, snapshot([(4, "EX1_001")]), *errors)
+        assert not result["success"]
+        assert len(payloads) == MAX_RETRIES + 1
+        assert sender.get_stats()["failed"] == 1
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self, sender):
+        errors = [FakeResponse(500)] * BREAKER_THRESHOLD
+        # One send retries MAX_RETRIES times, the next one hits the threshold
+        send(sender, snapshot([(4, "EX1_001")]), *errors)
+        send(sender, snapshot([(4, "EX1_001")]))
+        breaker = sender.breakers["log"]
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.failures == BREAKER_THRESHOLD
+
+        # Rejected without reaching the server
+        result, payloads = send(sender, snapshot([(4, "EX1_001")]))
+        assert not result["success"]
+        assert payloads == []
+        assert sender.get_stats()["rejected"] >= 1
+
+    def open_breaker(self, sender):
+        breaker = sender.breakers["log"] = CircuitBreaker()
+        for _ in range(BREAKER_THRESHOLD):
+            breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        # Cooldown elapsed
+        breaker.opened_at -= breaker.cooldown
+        return breaker
+
+    def test_half_open_allows_one_request(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0)
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow_request()
+
+    def test_half_open_closes_on_success(self, sender):
+        breaker = self.open_breaker(sender)
+        result, payloads = send(sender, snapshot([(4, "EX1_001")]))
+        assert result["success"]
+        assert len(payloads) == 1
+        assert (breaker.state, breaker.failures) == (CircuitBreaker.CLOSED, 0)
+
+    def test_half_open_reopens_on_failure(self, sender):
+        breaker = self.open_breaker(sender)
+        result, payloads = send(sender, snapshot([(4, "EX1_001")]), FakeResponse(500))
+        assert not result["success"]
+        # The trial request failed: no retry goes through until the cooldown is over
+        assert len(payloads) == 1
+        assert breaker.state == CircuitBreaker.OPEN
+        assert sender.get_stats()["rejected"] == 1
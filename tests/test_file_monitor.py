@@ -0,0 +1,31 @@
+from file_monitor import PollingChangeSource, WatchdogChangeSource
+
+
+def test_polling_change_source(tmpdir):
+    path = tmpdir.join("Power.log")
+    path.write("")
+    source = PollingChangeSource()
+    source.watch(str(path))
+    assert not source.poll()
+
+    path.write("D 20:00:00.0000000 GameState.DebugPrintPower() - CREATE_GAME\n", mode="a")
+    assert source.poll()
+    assert not source.poll()
+
+
+def test_watchdog_change_source_without_events(tmpdir, monkeypatch):
+    path = tmpdir.join("Power.log")
+    path.write("")
+    source = WatchdogChangeSource()
+    source.watch(str(path))
+    try:
+        assert source.observer is not None
+        # Simulate a notification that never arrives (file held open on Windows)
+        monkeypatch.setattr(source.changed, "set", lambda: None)
+        assert not source.poll()
+
+        path.write("D 20:00:00.0000000 GameState.DebugPrintPower() - CREATE_GAME\n", mode="a")
+        assert source.poll()
+        assert not source.poll()
+    finally:
+        source.stop()
@@ -0,0 +1,142 @@
+from hslog.synthetic import PowerLogGenerator
+
+from log_parser import HSLogWatcher
+
+
+GAME_ENDED = "게임이 종료되었습니다."
+
+
+def make_watcher(tmpdir, lines):
+    path = tmpdir.join("Power.log")
+    path.write("".join(lines))
+    messages = []
+    watcher = HSLogWatcher(messages.append)
+    watcher.checkpoint_path = str(tmpdir.join("parser_checkpoint.dat"))
+    watcher.set_log_path(str(path))
+    return watcher, messages
+
+
+def append(watcher, lines):
+    with open(watcher.log_path, "a") as f:
+        f.writelines(lines)
+
+
+def split_after_games(lines, count):
+    """Split `lines` right after the `count`-th game has ended."""
+    ended = 0
+    for i, line in enumerate(lines):
+        if "tag=STATE value=COMPLETE" in line and "Entity=GameEntity" in line:
+            ended += 1
+            if ended == count:
+                return lines[:i + 1], lines[i + 1:]
+    raise ValueError("Only %i games in the log" % (ended))
+
+
+def test_replayed_games_are_not_announced(tmpdir):
+    lines = list(PowerLogGenerator(games=3, turns=4, power_task_list=False, seed=1))
+    history, live = split_after_games(lines, 2)
+    watcher, messages = make_watcher(tmpdir, history)
+
+    assert watcher.parse_log_file()
+    assert watcher.caught_up
+    assert GAME_ENDED not in messages
+
+    append(watcher, live)
+    assert watcher.parse_log_file()
+    assert messages.count(GAME_ENDED) == 1
+
+
+def test_entities_outside_blocks_mark_changes(tmpdir):
+    watcher, messages = make_watcher(tmpdir, PowerLogGenerator(games=1, turns=2, seed=1))
+    assert watcher.parse_log_file()
+
+    watcher.game_observer.changed = False
+    append(watcher, [
+        "D 20:59:59.0000000 GameState.DebugPrintPower() - "
+        "SHOW_ENTITY - Updating Entity=4 CardID=EX1_001\n",
+    ])
+    assert watcher.parse_log_file()
+    assert watcher.game_observer.changed
+
+
+def record_sends(watcher):
+    sent = []
+    watcher.mount_log_file = lambda: True
+    watcher.api_sender.send_log_data = lambda log_data, stamps=None: sent.append(stamps)
+    return sent
+
+
+def test_catch_up_reads_are_not_stamped(tmpdir):
+    watcher, messages = make_watcher(tmpdir, PowerLogGenerator(games=1, turns=4, seed=1))
+    sent = record_sends(watcher)
+
+    watcher.tick()
+    assert len(sent) == 1
+    assert "log" not in sent[0] and "read" not in sent[0]
+    assert "exported" in sent[0]
+
+
+def test_stale_read_stamps_are_not_exported(tmpdir):
+    lines = list(PowerLogGenerator(games=1, turns=4, power_task_list=False, seed=1))
+    watcher, messages = make_watcher(tmpdir, lines[:-100])
+    sent = record_sends(watcher)
+    watcher.tick()
+
+    # Live lines are stamped
+    append(watcher, lines[-100:-50])
+    watcher.tick(remount=False)
+    assert len(sent) == 2
+    assert {"log", "read", "parsed", "exported"} <= set(sent[-1])
+
+    # A change tick reading lines that do not change the game state exports nothing...
+    append(watcher, [
+        "D 21:00:00.0000000 GameState.DebugPrintOptions() - id=1\n",
+    ])
+    watcher.tick(remount=False)
+    assert len(sent) == 2
+
+    # ...and the next full tick does not reuse the stamps of that read
+    watcher.tick()
+    assert len(sent) == 3
+    assert set(sent[-1]) == {"exported"}
+
+
+def test_transient_errors_keep_the_checkpoint(tmpdir, monkeypatch):
+    watcher, messages = make_watcher(tmpdir, PowerLogGenerator(games=1, turns=4, seed=1))
+    assert watcher.parse_log_file()
+    assert watcher.save_checkpoint()
+    offset = watcher.log_offset
+
+    # Sharing violation while reading
+    def read_new_lines(**kwargs):
+        raise PermissionError(13, "The process cannot access the file")
+
+    monkeypatch.setattr(watcher, "read_new_lines", read_new_lines)
+    append(watcher, ["D 21:00:00.0000000 GameState.DebugPrintOptions() - id=1\n"])
+    assert not watcher.parse_log_file()
+    assert tmpdir.join("parser_checkpoint.dat").check()
+    monkeypatch.undo()
+
+    # Log path not known yet
+    log_path, watcher.log_path = watcher.log_path, None
+    assert not watcher.parse_log_file()
+    assert tmpdir.join("parser_checkpoint.dat").check()
+    watcher.log_path = log_path
+
+    # Resumes from the checkpoint
+    assert watcher.parse_log_file()
+    assert watcher.checkpoint_offset == offset
+
+
+def test_parser_errors_discard_the_checkpoint(tmpdir, monkeypatch):
+    watcher, messages = make_watcher(tmpdir, PowerLogGenerator(games=1, turns=4, seed=1))
+    assert watcher.parse_log_file()
+    assert watcher.save_checkpoint()
+
+    def read_line(line):
+        raise AssertionError("Broken parsing state")
+
+    monkeypatch.setattr(watcher.parser, "read_line", read_line)
+    append(watcher, ["D 21:00:00.0000000 GameState.DebugPrintOptions() - id=1\n"])
+    assert not watcher.parse_log_file()
+    assert not tmpdir.join("parser_checkpoint.dat").check()
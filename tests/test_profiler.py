@@ -0,0 +1,28 @@
+from profiler import TickProfiler
+
+
+def test_change_ticks_are_timed_separately(tmpdir, monkeypatch):
+    monkeypatch.delenv("HS_TRACKER_PROFILE", raising=False)
+    path = tmpdir.join("tick_profile.log")
+    profiler = TickProfiler(str(path))
+    assert profiler.configure("timers", every=2) == "timers"
+
+    def tick():
+        with profiler.stage("parse_log_file"):
+            pass
+
+    for _ in range(5):
+        profiler.run_change_tick(tick)
+    profiler.run_tick(tick)
+    profiler.run_tick(tick)
+
+    stats = profiler.get_stats()
+    assert stats["full"]["tick"]["count"] == 2
+    assert stats["full"]["parse_log_file"]["count"] == 2
+    assert stats["change"]["tick"]["count"] == 5
+    assert stats["change"]["parse_log_file"]["count"] == 5
+
+    dump = path.read_text("utf-8")
+    assert "최근 전체 주기 2틱" in dump
+    assert "[전체 주기, 2틱]" in dump
+    assert "[변경 알림 주기, 5틱]" in dump